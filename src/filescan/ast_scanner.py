@@ -3,7 +3,7 @@ from astroid import nodes
 
 import os
 from pathlib import Path
-from typing import Optional, Union, Dict
+from typing import Dict, Iterator, Optional, Set, Union
 
 from .base import ScannerBase
 from .utils import load_ignore_spec
@@ -46,34 +46,116 @@ class AstScanner(ScannerBase):
         self._qualified_name_to_id: Dict[str, str] = {}
         self._ast_modules: Dict[str, nodes.Module] = {}
         self._module_imports: Dict[str, Dict[str, str]] = {}
+        self._module_paths: Dict[str, str] = {}
+
+        # module_path -> relation targets that named no known symbol;
+        # lets an incremental refresh find modules a new symbol affects
+        self.unresolved: Dict[str, Set[str]] = {}
+        self._missing: Set[str] = set()
 
     # =====================================================
     # Public API
     # =====================================================
 
     def scan_into(self, graph) -> None:
-        self._qualified_name_to_id.clear()
-        self._ast_modules.clear()
-        self._module_imports.clear()
+        self._reset_state()
 
         if self._ignore_spec is None and self.ignore_file:
             self._ignore_spec = load_ignore_spec(self.ignore_file)
 
         # PASS 1 — Definitions
         for root in self.root:
-            for path in sorted(root.rglob("*.py")):
-                if self._is_ignored(path):
-                    continue
+            for path in sorted(self._iter_py_files(root)):
                 self._collect_definitions(graph, path, root)
 
         # PASS 2 — Relationships
         for module_name, module in self._ast_modules.items():
             self._resolve_references(graph, module_name, module)
 
+    def scan_files_into(
+        self,
+        graph,
+        paths,
+        known_symbols: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Scan only the given .py files (each under one of the roots).
+
+        `known_symbols` seeds qualified name -> node id so relations into
+        modules that are not re-scanned still resolve.
+        """
+        self._reset_state()
+
+        if known_symbols:
+            self._qualified_name_to_id.update(known_symbols)
+
+        if self._ignore_spec is None and self.ignore_file:
+            self._ignore_spec = load_ignore_spec(self.ignore_file)
+
+        # PASS 1 — Definitions
+        for path in sorted(Path(p) for p in paths):
+            root = self._root_of(path)
+            if root is None or self._is_ignored(path):
+                continue
+            self._collect_definitions(graph, path, root)
+
+        # PASS 2 — Relationships
+        for module_name, module in self._ast_modules.items():
+            self._resolve_references(graph, module_name, module)
+
     # =====================================================
     # Helpers
     # =====================================================
 
+    def _reset_state(self) -> None:
+        self._qualified_name_to_id.clear()
+        self._ast_modules.clear()
+        self._module_imports.clear()
+        self._module_paths.clear()
+        self.unresolved = {}
+
+    def _iter_py_files(self, root: Path) -> Iterator[Path]:
+        """
+        Yield non-ignored .py files under root.
+
+        Ignored directories are pruned as a whole instead of matching
+        every file beneath them; symlinked directories are not followed.
+        """
+        is_ignored = self._is_ignored_rel
+        stack = [(root, "")]
+
+        while stack:
+            path, rel_str = stack.pop()
+            prefix = rel_str + "/" if rel_str else ""
+
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    is_link_dir = is_dir and entry.is_symlink()
+                except OSError:
+                    continue
+
+                name = entry.name
+                rel = prefix + name
+
+                if is_dir:
+                    if not is_link_dir and not is_ignored(rel, True):
+                        stack.append((path / name, rel))
+                elif name.endswith(".py") and not is_ignored(rel, False):
+                    yield path / name
+
+    def _root_of(self, path: Path) -> Optional[Path]:
+        for root in self.root:
+            if root in path.parents:
+                return root
+        return None
+
     def _get_docstring_first_line(self, node) -> Optional[str]:
         doc_node = getattr(node, "doc_node", None)
         if doc_node is None:
@@ -122,6 +204,7 @@ class AstScanner(ScannerBase):
             return
 
         self._ast_modules[module_name] = module
+        self._module_paths[module_name] = module_path
 
         import_map: Dict[str, str] = {}
 
@@ -272,6 +355,8 @@ class AstScanner(ScannerBase):
         import_map = self._module_imports.get(module_name, {})
         module_id = self._qualified_name_to_id.get(module_name)
 
+        self._missing = missing = set()
+
         # IMPORTS
         for _local, full in import_map.items():
             self._maybe_link(graph, module_id, full, "imports", None, None)
@@ -387,6 +472,9 @@ class AstScanner(ScannerBase):
             except Exception:
                 continue
 
+        if missing:
+            self.unresolved[self._module_paths[module_name]] = missing
+
     # =====================================================
     # Edge helper
     # =====================================================
@@ -401,9 +489,13 @@ class AstScanner(ScannerBase):
         end_lineno: Optional[int],
     ) -> None:
 
+        if source_id is None:
+            return
+
         target_id = self._qualified_name_to_id.get(qualified_name)
 
-        if source_id is None or target_id is None:
+        if target_id is None:
+            self._missing.add(qualified_name)
             return
 
         edge_key = f"{source_id}|{relation}|{target_id}|{lineno or ''}"
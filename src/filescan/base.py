@@ -63,7 +63,10 @@ class ScannerBase:
 
     @staticmethod
     def _hash(s: str, index: int) -> str:
-        return hashlib.sha1(s.encode("utf-8")).hexdigest()[:index]
+        # Hex-encode only the digest bytes that survive the cut; IDs are
+        # graph keys, not a security boundary.
+        digest = hashlib.sha1(s.encode("utf-8"), usedforsecurity=False).digest()
+        return digest[: (index + 1) // 2].hex()[:index]
 
     # =====================================================
     # Node ID generation
@@ -73,27 +76,9 @@ class ScannerBase:
         """
         Deterministic collision-safe node ID.
         """
-        existing = self._node_key_to_id.get(canonical_key)
-        if existing:
-            return existing
-
-        salt = 0
-
-        while True:
-            candidate = canonical_key if salt == 0 else f"{canonical_key}#{salt}"
-            node_id = self._hash(candidate, self.HASH_INDEX)
-
-            existing_key = self._node_id_to_key.get(node_id)
-
-            if existing_key is None:
-                self._node_id_to_key[node_id] = canonical_key
-                self._node_key_to_id[canonical_key] = node_id
-                return node_id
-
-            if existing_key == canonical_key:
-                return node_id
-
-            salt += 1
+        return self._generate_id(
+            canonical_key, self._node_key_to_id, self._node_id_to_key
+        )
 
     # =====================================================
     # Edge ID generation
@@ -104,7 +89,20 @@ class ScannerBase:
         Deterministic collision-safe edge ID.
         Canonical key must be constructed by concrete scanner.
         """
-        existing = self._edge_key_to_id.get(canonical_key)
+        return self._generate_id(
+            canonical_key, self._edge_key_to_id, self._edge_id_to_key
+        )
+
+    def _generate_id(
+        self,
+        canonical_key: str,
+        key_to_id: dict,
+        id_to_key: dict,
+    ) -> str:
+        """
+        Shared salt-until-unique ID allocation for nodes and edges.
+        """
+        existing = key_to_id.get(canonical_key)
         if existing:
             return existing
 
@@ -112,17 +110,17 @@ class ScannerBase:
 
         while True:
             candidate = canonical_key if salt == 0 else f"{canonical_key}#{salt}"
-            edge_id = self._hash(candidate, self.HASH_INDEX)
+            new_id = self._hash(candidate, self.HASH_INDEX)
 
-            existing_key = self._edge_id_to_key.get(edge_id)
+            existing_key = id_to_key.get(new_id)
 
             if existing_key is None:
-                self._edge_id_to_key[edge_id] = canonical_key
-                self._edge_key_to_id[canonical_key] = edge_id
-                return edge_id
+                id_to_key[new_id] = canonical_key
+                key_to_id[canonical_key] = new_id
+                return new_id
 
             if existing_key == canonical_key:
-                return edge_id
+                return new_id
 
             salt += 1
 
@@ -166,11 +164,33 @@ class ScannerBase:
 
         return edge_id
 
+    def row_builders(self, graph) -> tuple:
+        """
+        Return (node_builder, edge_builder) for positional rows.
+
+        Each builder takes a full row in NODE_SCHEMA / EDGE_SCHEMA order
+        (id first). Graphs that store compact records provide
+        their own builders; any other graph gets plain dict rows.
+        """
+        builders = []
+
+        for kind, schema in (("node", self.NODE_SCHEMA), ("edge", self.EDGE_SCHEMA)):
+            fields = tuple(name for name, _ in schema)
+            factory = getattr(graph, f"{kind}_row_builder", None)
+            record_type = getattr(graph, f"{kind}_record_type", None)
+
+            if factory is not None and record_type().FIELDS == fields:
+                builders.append(factory())
+            else:
+                builders.append(lambda row, fields=fields: dict(zip(fields, row)))
+
+        return tuple(builders)
+
     # =====================================================
     # Ignore Handling
     # =====================================================
 
-    def _is_ignored(self, path: Path) -> bool:
+    def _is_ignored(self, path: Path, is_dir: Optional[bool] = None) -> bool:
         if self._ignore_spec is None:
             return False
 
@@ -183,11 +203,24 @@ class ScannerBase:
         else:
             return False
 
-        rel_str = os.path.normpath(str(rel))
+        rel_str = os.path.normpath(str(rel)).replace(os.sep, "/")
+
+        if is_dir is None:
+            is_dir = path.is_dir()
+
+        return self._is_ignored_rel(rel_str, is_dir)
+
+    def _is_ignored_rel(self, rel_str: str, is_dir: bool) -> bool:
+        """
+        Ignore check for a root-relative POSIX path string.
 
-        if path.is_dir():
-            rel_str += os.sep
+        Walkers that build `rel_str` incrementally call this directly and
+        skip the per-path `relative_to` / `normpath` work.
+        """
+        if self._ignore_spec is None:
+            return False
 
-        rel_str = rel_str.replace(os.sep, "/")
+        if is_dir:
+            rel_str += "/"
 
         return bool(self._ignore_spec.match_file(rel_str))
\ No newline at end of file
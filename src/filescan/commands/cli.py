@@ -1,8 +1,10 @@
 import argparse
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 from ..graph_builder import GraphBuilder
-from ..search_engine import SearchEngine
+from ..search_engine import SearchEngine, group_by_symbol
 from ..file_watcher import FileWatcher
 
 
@@ -27,6 +29,13 @@ def resolve_output_prefix(root: Path, output_arg: str | None) -> str:
     return root.name or "graph"
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
 # =====================================================
 # Scan Command
 # =====================================================
@@ -45,6 +54,7 @@ def cmd_scan(args):
         ignore_file=ignore_file,
         include_filesystem=include_filesystem,
         include_ast=include_ast,
+        collect_size=not args.no_size,
     )
 
     if include_filesystem:
@@ -101,42 +111,48 @@ def cmd_search(args):
 
     engine = SearchEngine(root, builder.ast)
 
-    results = engine.search(args.query)
+    # Grouping below sets the output order, so skip search()'s sort;
+    # with --limit only the top results by priority are kept
+    if args.limit is not None:
+        results = engine.search_topk(args.query, args.limit)
+    else:
+        results = list(engine.iter_search(args.query))
 
     if not results:
         print("No results found.")
         return
 
-    printed_symbols = set()
-
-    for r in results:
-        file_path = r["file"]
-        line = r["line"]
-        text = r["text"]
-        match_type = r.get("match_type", "unknown")
-        symbol = r.get("symbol")
-        sid = r.get("symbol_id")
+    # One header per file, one definition snippet per symbol
+    groups = group_by_symbol(results)
 
+    for file_path, file_groups in groupby(groups, key=itemgetter("file")):
         print("=" * 80)
-        print(f"[{match_type.upper()}]  {file_path}:{line}")
+        print(f"File: {file_path}")
+
+        for group in file_groups:
+            sid = group["symbol_id"]
+            symbol = group["symbol"]
+            symbol_results = group["matches"]
 
-        if symbol:
-            print(f"Symbol: {symbol.get('qualified_name')}")
-        else:
-            print("Symbol: <no semantic symbol>")
+            print("-" * 80)
+            if symbol:
+                print(f"Symbol: {symbol.get('qualified_name')}")
+            else:
+                print("Symbol: <no semantic symbol>")
 
-        print(f"Code  : {text}")
+            for r in symbol_results:
+                match_type = r.get("match_type", "unknown")
+                print(f"[{match_type.upper()}]  {file_path}:{r['line']}")
+                print(f"Code  : {r['text']}")
 
-        # Extract definition once per symbol
-        if sid and sid not in printed_symbols:
-            printed_symbols.add(sid)
-            snippet = builder.extract_node_source(root, sid)
-            if snippet:
-                print("\n--- Definition Source ---")
-                print(snippet.rstrip())
-                print("--- End Definition ---")
+            if sid:
+                snippet = builder.extract_node_source(root, sid)
+                if snippet:
+                    print("\n--- Definition Source ---")
+                    print(snippet.rstrip())
+                    print("--- End Definition ---")
 
-        print()
+            print()
 
     print("=" * 80)
     print(f"Total results: {len(results)}")
@@ -225,6 +241,11 @@ def main():
     scan.add_argument("--ast-only", action="store_true", help="Only run AST scan")
     scan.add_argument("-o", "--output", default=None)
     scan.add_argument("--output-ast", help="Separate output prefix for AST scan")
+    scan.add_argument(
+        "--no-size",
+        action="store_true",
+        help="Skip per-file stat; sizes are left empty",
+    )
     scan.set_defaults(func=cmd_scan)
 
     # ----------------------
@@ -246,6 +267,12 @@ def main():
     search.add_argument("query", help="Search query")
     search.add_argument("--nodes", required=True, help="Path to AST *_nodes.csv")
     search.add_argument("--edges", required=True, help="Path to AST *_edges.csv")
+    search.add_argument(
+        "--limit",
+        type=positive_int,
+        default=None,
+        help="Show only the N highest-priority results",
+    )
     search.set_defaults(func=cmd_search)
 
     # ----------------------
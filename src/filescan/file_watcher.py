@@ -1,7 +1,7 @@
 import threading
 import time
 from pathlib import Path
-from typing import Optional, Set, Tuple, Union, List
+from typing import Dict, Optional, Set, Tuple, Union, List
 
 from watchfiles import watch, Change
 
@@ -9,6 +9,11 @@ from .graph_builder import GraphBuilder
 
 PathLike = Union[str, Path]
 
+_ADD_DEL = frozenset({Change.added, Change.deleted})
+
+# When one path appears several times in a batch, the most severe change wins
+_SEVERITY = {Change.modified: 0, Change.added: 1, Change.deleted: 2}
+
 
 class FileWatcher:
     """
@@ -87,8 +92,7 @@ class FileWatcher:
             if now - self._last_trigger_time < self.debounce_seconds:
                 continue
 
-            fs_trigger = self._should_trigger_filesystem_scan(changes)
-            ast_trigger = self._should_trigger_ast_scan(changes)
+            fs_trigger, ast_trigger = self._classify(changes)
 
             if not fs_trigger and not ast_trigger:
                 continue
@@ -133,15 +137,22 @@ class FileWatcher:
     # Trigger Logic
     # ==========================================================
 
-    def _should_trigger_filesystem_scan(
-        self, changes: Set[Tuple[Change, str]]
-    ) -> bool:
-        return any(change in (Change.added, Change.deleted) for change, _ in changes)
+    @staticmethod
+    def _classify(changes: Set[Tuple[Change, str]]) -> Tuple[bool, bool]:
+        """
+        Return (filesystem_trigger, ast_trigger) in a single pass,
+        stopping as soon as both are known.
+        """
+        fs_trigger = False
+        ast_trigger = False
+
+        for change, path in changes:
+            fs_trigger = fs_trigger or change in _ADD_DEL
+            ast_trigger = ast_trigger or path.endswith(".py")
+            if fs_trigger and ast_trigger:
+                break
 
-    def _should_trigger_ast_scan(
-        self, changes: Set[Tuple[Change, str]]
-    ) -> bool:
-        return any(Path(path).suffix == ".py" for _, path in changes)
+        return fs_trigger, ast_trigger
 
     # ==========================================================
     # Change Handling (Incremental)
@@ -158,14 +169,23 @@ class FileWatcher:
         print("[watcher] Change detected at", time.strftime("%H:%M:%S"))
         print("[watcher] Total events:", len(changes))
 
+        touched: Dict[str, Change] = {}
+
+        for change, path_str in changes:
+            previous = touched.get(path_str)
+            if previous is None or _SEVERITY[change] > _SEVERITY[previous]:
+                touched[path_str] = change
+
         added_or_modified: List[Path] = []
         deleted: List[Path] = []
 
-        for change, path_str in changes:
+        for path_str, change in touched.items():
             path = Path(path_str).resolve()
             print("  -", change.name, ":", path)
 
-            if change == Change.deleted:
+            # Delete + recreate in one batch (rename-on-save, checkouts)
+            # merges to "deleted"; a path still on disk was recreated
+            if change == Change.deleted and not path.exists():
                 deleted.append(path)
             else:
                 added_or_modified.append(path)
@@ -201,10 +221,7 @@ class FileWatcher:
 
         if ast_trigger and py_paths:
             print("\n>>> AST partial update")
-            self.builder.update_ast_paths(
-                py_paths,
-                ignore_file=self.ignore_file,
-            )
+            self.builder.refresh(py_paths)
             graph_changed = True
 
         # ----------------------------------------
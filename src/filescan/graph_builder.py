@@ -1,14 +1,547 @@
 import os
 import csv
 import json
+import hashlib
+import mmap
+import pickle
 import re
+import sys
+from array import array
+from bisect import bisect_right
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 from .scanner import Scanner
 from .ast_scanner import AstScanner
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _require_pyarrow():
+    """
+    Import pyarrow lazily; Parquet support is an optional extra.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet support requires pyarrow: pip install filescan[parquet]"
+        ) from exc
+    return pyarrow, pyarrow.parquet
+
+
+# ==============================================================================
+# Row Storage
+# ==============================================================================
+
+class _Record(tuple):
+    """
+    Positional row with read-only access by field name.
+
+    Each schema gets its own subclass (see _record_type) so the
+    field -> position map is shared by every row instead of being
+    repeated per row as dict keys.
+    """
+
+    __slots__ = ()
+
+    FIELDS: Tuple[str, ...] = ()
+    INDEX: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            key = self.INDEX[key]
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = self.INDEX.get(key)
+        if index is None:
+            return default
+        return tuple.__getitem__(self, index)
+
+    def __contains__(self, key) -> bool:
+        # Membership tests field names, as on the dict rows this replaces
+        return key in self.INDEX
+
+    def keys(self):
+        return self.FIELDS
+
+    def items(self):
+        return zip(self.FIELDS, self)
+
+    def as_dict(self) -> Dict[str, object]:
+        return dict(zip(self.FIELDS, self))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in zip(self.FIELDS, self))
+        return f"_Record({fields})"
+
+    def __reduce__(self):
+        # Schema subclasses are created at runtime and share the base
+        # class name, so pickle rebuilds them from the field names
+        return _make_record, (self.FIELDS, tuple(self))
+
+
+@lru_cache(maxsize=None)
+def _record_type(fields: Tuple[str, ...]) -> type:
+    return type(
+        "_Record",
+        (_Record,),
+        {
+            "__slots__": (),
+            "FIELDS": fields,
+            "INDEX": {name: i for i, name in enumerate(fields)},
+        },
+    )
+
+
+def _make_record(fields: Tuple[str, ...], values: Tuple) -> _Record:
+    return _record_type(fields)(values)
+
+
+# Low-cardinality or cross-referenced fields; interning lets every row
+# share one string object per distinct value.
+_INTERNED_FIELDS = frozenset(
+    {"type", "kind", "name", "module_path", "source", "target", "relation"}
+)
+
+
+# Line-number fields. Scanners write ints; text loaders (CSV) yield
+# digit strings, which rows normalize to int ("" to None) so consumers
+# can compare line numbers directly.
+_INT_FIELDS = frozenset({"lineno", "end_lineno"})
+
+
+def _parse_int_cell(value: str):
+    if value.isascii() and value.isdigit():
+        return int(value)
+    return value or None
+
+
+@lru_cache(maxsize=None)
+def _row_builder(record_type: type):
+    """
+    Return a callable turning a mutable row list into a record,
+    interning the values of `_INTERNED_FIELDS` and parsing the values
+    of `_INT_FIELDS` on the way.
+    """
+    fields = record_type.FIELDS
+    positions = tuple(i for i, name in enumerate(fields) if name in _INTERNED_FIELDS)
+    int_positions = tuple(i for i, name in enumerate(fields) if name in _INT_FIELDS)
+
+    if not positions and not int_positions:
+        return record_type
+
+    intern = sys.intern
+
+    def build(row):
+        n = len(row)
+        for i in positions:
+            if i < n:
+                value = row[i]
+                if value.__class__ is str:
+                    row[i] = intern(value)
+        for i in int_positions:
+            if i < n:
+                value = row[i]
+                if value.__class__ is str:
+                    row[i] = _parse_int_cell(value)
+        return record_type(row)
+
+    return build
+
+
+# ==============================================================================
+# Source Access
+# ==============================================================================
+
+_NEWLINE = re.compile(b"\n")
+
+
+@lru_cache(maxsize=128)
+def _line_offsets(path: str, mtime_ns: int, size: int) -> array:
+    """
+    Byte offset of every line start in a source file.
+
+    offsets[i] is where line i + 1 begins; the last entry is the file size,
+    so line n spans offsets[n - 1]:offsets[n]. Keyed by (mtime, size) so
+    edits invalidate the entry even within one mtime tick. Only the
+    offsets are cached; the file is not kept open or mapped.
+    """
+    offsets = array("q", [0])
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return offsets
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offsets.extend(m.end() for m in _NEWLINE.finditer(data))
+
+    if offsets[-1] != size:
+        offsets.append(size)
+
+    return offsets
+
+
+def _stripped_span(f, size: int, block: int = 4096) -> Tuple[int, int]:
+    """
+    Byte range of an open binary file without leading/trailing whitespace.
+    """
+    start = 0
+    while start < size:
+        f.seek(start)
+        chunk = f.read(block)
+        stripped = chunk.lstrip()
+        if stripped:
+            start += len(chunk) - len(stripped)
+            break
+        start += len(chunk)
+
+    end = size
+    while end > start:
+        n = min(block, end - start)
+        f.seek(end - n)
+        chunk = f.read(n)
+        stripped = chunk.rstrip()
+        if stripped:
+            end -= len(chunk) - len(stripped)
+            break
+        end -= n
+
+    return start, end
+
+
+_COPY_BLOCK = 1 << 20
+
+
+def _copy_range(out, src, offset: int, count: int, block: int = _COPY_BLOCK) -> None:
+    """
+    Copy `count` bytes of `src` starting at `offset` to the end of `out`.
+
+    Uses os.sendfile (kernel-side copy) where available, otherwise a
+    chunked readinto/write loop over one reused buffer.
+    """
+    sendfile = getattr(os, "sendfile", None)
+
+    if sendfile is not None:
+        out.flush()
+        try:
+            while count > 0:
+                sent = sendfile(out.fileno(), src.fileno(), offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+            return
+        except OSError:
+            pass
+
+    src.seek(offset)
+    view = memoryview(bytearray(min(block, count)))
+    while count > 0:
+        n = src.readinto(view[:min(block, count)])
+        if not n:
+            break
+        out.write(view[:n])
+        count -= n
+
+
+# ==============================================================================
+# Symbol Range Index
+# ==============================================================================
+
+class _SymbolRanges:
+    """
+    Flat, immutable index of one file's (start, end, node_id) line ranges.
+
+    Ranges are sorted by (start, -end), so nested ranges sit after the
+    ranges enclosing them; `max_end[j]` is the largest end among ranges
+    0..j. A stabbing query bisects `starts` and walks left only while
+    some earlier range can still reach the line and still be short
+    enough to beat the best match so far.
+
+    The first query builds `line_ids`, a flat line -> range table, after
+    which every lookup is one array index. Files whose ranges reach past
+    LINE_TABLE_MAX keep using the walk.
+    """
+
+    __slots__ = ("starts", "ends", "max_end", "ids", "line_ids")
+
+    LINE_TABLE_MAX = 1 << 20
+
+    def __init__(self, ranges: List[Tuple[int, int, str]]):
+        ranges = sorted(ranges, key=lambda r: (r[0], -r[1]))
+
+        self.starts = array("i", [start for start, _, _ in ranges])
+        self.ends = array("i", [end for _, end, _ in ranges])
+        self.ids = [nid for _, _, nid in ranges]
+
+        self.max_end = array("i", self.ends)
+        for j in range(1, len(self.max_end)):
+            if self.max_end[j] < self.max_end[j - 1]:
+                self.max_end[j] = self.max_end[j - 1]
+
+        self.line_ids: Optional[array] = None
+
+    def innermost(self, line: int) -> Optional[str]:
+        table = self.line_ids
+
+        if table is None:
+            if not self.ids or self.max_end[-1] > self.LINE_TABLE_MAX:
+                return self._walk(line)
+            table = self.line_ids = self._line_table()
+
+        if 0 <= line < len(table):
+            j = table[line]
+            return self.ids[j] if j >= 0 else None
+        return None
+
+    def _line_table(self) -> array:
+        """
+        Map every line to the index of its innermost range, -1 if none.
+
+        Ranges are painted longest first (and, among equal lengths, last
+        first), so each line ends up owned by the same range `_walk`
+        would pick.
+        """
+        starts, ends = self.starts, self.ends
+        table = array("i", [-1]) * (self.max_end[-1] + 1)
+
+        order = sorted(
+            range(len(starts)),
+            key=lambda j: (ends[j] - starts[j], j),
+            reverse=True,
+        )
+        for j in order:
+            start, end = starts[j], ends[j]
+            table[start:end + 1] = array("i", [j]) * (end - start + 1)
+
+        return table
+
+    def _walk(self, line: int) -> Optional[str]:
+        starts, ends, max_end = self.starts, self.ends, self.max_end
+
+        # Running minimum over the walk; `<=` hands length ties to the
+        # earlier range since j decreases.
+        best_len = sys.maxsize
+        best = -1
+
+        for j in range(bisect_right(starts, line) - 1, -1, -1):
+            # Any range starting here or earlier spans more than best_len
+            if max_end[j] < line or line - starts[j] > best_len:
+                break
+            end = ends[j]
+            if end >= line:
+                length = end - starts[j]
+                if length <= best_len:
+                    best_len = length
+                    best = j
+
+        return self.ids[best] if best >= 0 else None
+
+
+def _no_symbol(line: int) -> None:
+    return None
+
+
+def _line_number(value) -> int:
+    """
+    Parse a lineno cell (int from scanners, str from CSV); -1 if missing.
+    """
+    if value.__class__ is int:
+        return value
+    if value and value.isascii() and value.isdigit():
+        return int(value)
+    return -1
+
+
+def _line_column(values: Sequence) -> array:
+    """
+    Parse a whole lineno column into array('i'), -1 where missing.
+
+    Scanner columns are plain ints and CSV columns plain digit strings,
+    so the array is first built in one C-level pass; only a column with
+    gaps falls back to per-cell parsing.
+    """
+    try:
+        return array("i", values)
+    except (TypeError, OverflowError):
+        pass
+
+    try:
+        return array("i", map(int, values))
+    except (TypeError, ValueError, OverflowError):
+        return array("i", map(_line_number, values))
+
+
+def _group_symbol_ranges(
+    node_ids: Sequence[str],
+    module_paths: Sequence,
+    starts: Sequence,
+    ends: Sequence,
+) -> Dict[str, List[Tuple[int, int, str]]]:
+    """
+    Bucket (start, end, node_id) ranges by module path.
+
+    Line columns are parsed in one pass up front, so the grouping loop
+    only compares ints.
+    """
+    starts = _line_column(starts)
+    ends = _line_column(ends)
+
+    by_file = defaultdict(list)
+    for nid, module_path, start, end in zip(node_ids, module_paths, starts, ends):
+        if module_path and start > 0 and end >= start:
+            by_file[module_path].append((start, end, nid))
+
+    return by_file
+
+
+# ==============================================================================
+# Index Build Scheduling
+# ==============================================================================
+
+def _gil_disabled() -> bool:
+    """
+    True on a free-threaded (PEP 703) interpreter running without the GIL.
+    """
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_enabled is not None and not is_enabled()
+
+
+def _run_tasks(tasks: List) -> None:
+    """
+    Run independent index builders, on threads when the GIL is off.
+
+    With the GIL on, threads would only add overhead and a process pool
+    would pay to pickle the whole graph, so tasks run inline.
+    """
+    if len(tasks) < 2 or not _gil_disabled():
+        for task in tasks:
+            task()
+        return
+
+    workers = min(len(tasks), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(task) for task in tasks]:
+            future.result()
+
+
+# ==============================================================================
+# JSON Export
+# ==============================================================================
+
+# Rows encoded per dumps() call while streaming a JSON export
+_JSON_BATCH = 4096
+
+
+def _dumps_indented(value) -> bytes:
+    """
+    Encode like json.dumps(value, indent=2, ensure_ascii=False), as UTF-8.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_INDENT_2, default=tuple)
+    return json.dumps(value, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _write_json_member(f, key: str, items: Sequence) -> None:
+    """
+    Write `  "key": [...]` as a member of a top-level indented object.
+
+    Items are encoded in batches nested under a one-key object, so the
+    indentation of each batch already matches its place in the document
+    and the full list is never encoded at once.
+    """
+    head = _dumps_indented({key: []})[:-len("[]\n}")]
+    f.write(head[len("{\n"):])
+
+    if not items:
+        f.write(b"[]")
+        return
+
+    # '{\n  "key": [\n' ... '\n  ]\n}' around each batch's rows
+    prefix = len(head) + len("[\n")
+    suffix = len("\n  ]\n}")
+
+    f.write(b"[\n")
+    for start in range(0, len(items), _JSON_BATCH):
+        if start:
+            f.write(b",\n")
+        batch = _dumps_indented({key: items[start:start + _JSON_BATCH]})
+        f.write(memoryview(batch)[prefix:-suffix])
+    f.write(b"\n  ]")
+
+
+def _write_json_graph(f, graph: "_Graph") -> None:
+    """
+    Stream a graph's JSON export to a binary file.
+
+    Byte-identical to json.dump of the whole document with indent=2 and
+    ensure_ascii=False, but peak memory is one batch of encoded rows.
+    orjson does the encoding when installed.
+    """
+    members = (
+        ("node_schema", [
+            {"name": name, "description": desc}
+            for name, desc in graph.node_schema
+        ]),
+        ("edge_schema", [
+            {"name": name, "description": desc}
+            for name, desc in graph.edge_schema
+        ]),
+        ("nodes", list(graph.nodes.values())),
+        ("edges", graph.edges),
+    )
+
+    f.write(b"{\n")
+    for i, (key, items) in enumerate(members):
+        if i:
+            f.write(b",\n")
+        _write_json_member(f, key, items)
+    f.write(b"\n}")
+
+
+# ==============================================================================
+# Load Cache
+# ==============================================================================
+
+# Bump when the pickled _Graph layout changes
+_LOAD_CACHE_VERSION = 2
+
+
+def _load_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "filescan"
+
+
+def _load_cache_path(target: str, *paths: Optional[Path]) -> Path:
+    """
+    Sidecar location for a graph loaded into `target`, keyed by each
+    input's resolved path, mtime and size.
+
+    The target is part of the key: only AST loads carry the semantic
+    indexes, so a filesystem sidecar must not serve an AST load.
+    """
+    parts = [str(_LOAD_CACHE_VERSION), target]
+    for path in paths:
+        if path is None:
+            parts.append("-")
+            continue
+        path = Path(path).resolve()
+        stat = path.stat()
+        parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+
+    digest = hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16)
+    return _load_cache_dir() / f"load-{digest.hexdigest()}.pkl"
+
 
 # ==============================================================================
 # Internal Graph Container
@@ -16,8 +549,8 @@ from .ast_scanner import AstScanner
 
 class _Graph:
     def __init__(self):
-        self.nodes: Dict[str, Dict] = {}
-        self.edges: List[Dict] = []
+        self.nodes: Dict[str, _Record] = {}
+        self.edges: List[_Record] = []
         self.edge_ids: set[str] = set()
 
         # FULL schema: (name, description)
@@ -27,11 +560,335 @@ class _Graph:
         self.out_edges: Dict[str, List[Dict]] = defaultdict(list)
         self.in_edges: Dict[str, List[Dict]] = defaultdict(list)
 
+        # source -> {target: (position in out_edges, relation)}; filled
+        # lazily per source and dropped whenever adjacency changes
+        self._first_relations: Dict[str, Dict[str, Tuple[int, str]]] = {}
+
         # AST semantic indexes
         self.by_qname: Dict[str, str] = {}
         self.by_name: Dict[str, List[str]] = defaultdict(list)
         self.symbols_by_file: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
 
+        # Per-file node ids, for incremental updates
+        self.nodes_by_file: Dict[str, List[str]] = defaultdict(list)
+
+        # Per-file range index; rebuilt on reindex
+        self.symbol_ranges: Dict[str, _SymbolRanges] = {}
+
+    # -------------------------------------------------
+    # Row access
+    # -------------------------------------------------
+
+    def node_record_type(self) -> type:
+        return _record_type(tuple(name for name, _ in self.node_schema))
+
+    def edge_record_type(self) -> type:
+        return _record_type(tuple(name for name, _ in self.edge_schema))
+
+    def node_row_builder(self):
+        """
+        Callable turning a schema-ordered row list into a node record.
+
+        Scanners that know their schema write records through this
+        directly, skipping the intermediate dict row.
+        """
+        return _row_builder(self.node_record_type())
+
+    def edge_row_builder(self):
+        return _row_builder(self.edge_record_type())
+
+    @property
+    def node_field_index(self) -> Dict[str, int]:
+        return self.node_record_type().INDEX
+
+    @property
+    def edge_field_index(self) -> Dict[str, int]:
+        return self.edge_record_type().INDEX
+
+    def node_field(self, node_id: str, field: str):
+        return self.nodes[node_id].get(field)
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        node = self.nodes.get(node_id)
+        return node.as_dict() if node is not None else None
+
+    def node_columns(self, *fields: str) -> List[Sequence]:
+        """
+        Column-major view of the node table, in `self.nodes` order.
+
+        Returns one sequence per requested field; fields missing from
+        the schema come back as all-None columns.
+        """
+        count = len(self.nodes)
+        index = self.node_field_index
+        columns = list(zip(*self.nodes.values())) if count else []
+
+        return [
+            columns[index[field]] if field in index and count else (None,) * count
+            for field in fields
+        ]
+
+    # -------------------------------------------------
+    # Pickling (load cache)
+    # -------------------------------------------------
+
+    def __getstate__(self):
+        # Records are dynamic subclasses, so rows travel as plain tuples;
+        # adjacency references the edge rows and is rebuilt on load.
+        self.compact()
+
+        state = self.__dict__.copy()
+        state["nodes"] = {nid: tuple(row) for nid, row in self.nodes.items()}
+        state["edges"] = list(map(tuple, self.edges))
+        del state["out_edges"], state["in_edges"], state["_first_relations"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        node_type = self.node_record_type()
+        self.nodes = dict(zip(self.nodes, map(node_type, self.nodes.values())))
+        self.edges = list(map(self.edge_record_type(), self.edges))
+        self.rebuild_adjacency()
+
+    def set_nodes(self, rows) -> None:
+        """
+        Replace all nodes with records built from positional rows.
+        """
+        node_type = self.node_record_type()
+        id_idx = node_type.INDEX["id"]
+        build = _row_builder(node_type)
+        self.nodes = {row[id_idx]: build(row) for row in rows}
+
+    def set_edges(self, rows) -> None:
+        """
+        Replace all edges with records built from positional rows.
+        """
+        edge_type = self.edge_record_type()
+        id_idx = edge_type.INDEX["id"]
+        self.edges = list(map(_row_builder(edge_type), rows))
+        self.edge_ids = {edge[id_idx] for edge in self.edges}
+
+    def compact(self) -> None:
+        """
+        Convert dict rows written by scanners into schema records.
+
+        Raises ValueError if dict rows exist but the matching schema is
+        unset, rather than dropping every field.
+        """
+        if not self.node_schema and any(
+            not isinstance(node, _Record) for node in self.nodes.values()
+        ):
+            raise ValueError("cannot compact node rows: graph has no node schema")
+        if not self.edge_schema and any(
+            not isinstance(edge, _Record) for edge in self.edges
+        ):
+            raise ValueError("cannot compact edge rows: graph has no edge schema")
+
+        node_type = self.node_record_type()
+        build = _row_builder(node_type)
+        for nid, node in self.nodes.items():
+            if not isinstance(node, _Record):
+                self.nodes[nid] = build([node.get(f) for f in node_type.FIELDS])
+
+        edge_type = self.edge_record_type()
+        build = _row_builder(edge_type)
+        self.edges = [
+            edge if isinstance(edge, _Record)
+            else build([edge.get(f) for f in edge_type.FIELDS])
+            for edge in self.edges
+        ]
+
+    def rebuild_adjacency(self) -> None:
+        """
+        Rebuild out_edges / in_edges from `edges` in one pass.
+
+        Lists keep edge order. Appending into fresh buckets measured
+        faster than a sort + groupby bucket build on real graphs, since
+        CPython's sort cost dominates any locality gain.
+        """
+        out_edges = defaultdict(list)
+        in_edges = defaultdict(list)
+
+        if self.edges:
+            index = self.edge_field_index
+            src_i = index["source"]
+            tgt_i = index["target"]
+
+            for edge in self.edges:
+                out_edges[edge[src_i]].append(edge)
+                in_edges[edge[tgt_i]].append(edge)
+
+        self.out_edges = out_edges
+        self.in_edges = in_edges
+        self._first_relations = {}
+
+    def relations_from(self, source: str) -> Dict[str, Tuple[int, str]]:
+        """
+        Map each target of `source` to (position, relation) of the first
+        out-edge reaching it, in `out_edges[source]` order.
+
+        Lets callers test a set of targets against a node's edges with
+        hash lookups; the smallest position is the edge a linear scan of
+        out_edges would have found first.
+        """
+        relations = self._first_relations.get(source)
+        if relations is not None:
+            return relations
+
+        relations = {}
+        edges = self.out_edges.get(source)
+        if edges:
+            index = self.edge_field_index
+            tgt_i = index["target"]
+            rel_i = index.get("relation")
+
+            for pos, edge in enumerate(edges):
+                target = edge[tgt_i]
+                if target not in relations:
+                    relation = edge[rel_i] if rel_i is not None else "unknown"
+                    relations[target] = (pos, relation)
+
+        self._first_relations[source] = relations
+        return relations
+
+    def find_symbol_at(self, module_path: str, line: int) -> Optional[str]:
+        """
+        Return the id of the innermost symbol enclosing `line`.
+        """
+        ranges = self.symbol_ranges.get(module_path)
+        return ranges.innermost(line) if ranges is not None else None
+
+    def symbol_lookup(self, module_path: str) -> Callable[[int], Optional[str]]:
+        """
+        Bound `line -> innermost symbol id` lookup for one file.
+
+        For callers resolving many lines of the same file: the per-file
+        index is fetched once instead of on every find_symbol_at call.
+        """
+        ranges = self.symbol_ranges.get(module_path)
+        return ranges.innermost if ranges is not None else _no_symbol
+
+    # -------------------------------------------------
+    # Incremental updates (AST graph)
+    # -------------------------------------------------
+
+    def remove_file(self, module_path: str) -> List[_Record]:
+        """
+        Drop every node of one module and the edges touching them.
+
+        Indexes are updated in place. Returns the removed edges coming
+        from other modules, so a caller re-adding the module can restore
+        those that still resolve.
+        """
+        doomed = set(self.nodes_by_file.pop(module_path, ()))
+        if not doomed:
+            return []
+
+        index = self.node_field_index
+        qname_i = index["qualified_name"]
+        name_i = index["name"]
+
+        for nid in doomed:
+            node = self.nodes.pop(nid, None)
+            if node is None:
+                continue
+
+            qname = node[qname_i]
+            if qname and self.by_qname.get(qname) == nid:
+                del self.by_qname[qname]
+
+            ids = self.by_name.get(node[name_i])
+            if ids is not None:
+                ids.remove(nid)
+                if not ids:
+                    del self.by_name[node[name_i]]
+
+        self.symbols_by_file.pop(module_path, None)
+        self.symbol_ranges.pop(module_path, None)
+
+        index = self.edge_field_index
+        id_i = index["id"]
+        src_i = index["source"]
+        tgt_i = index["target"]
+
+        dead = {}
+        incoming = []
+
+        for nid in doomed:
+            for edge in self.out_edges.pop(nid, ()):
+                dead[edge[id_i]] = edge
+            for edge in self.in_edges.pop(nid, ()):
+                dead[edge[id_i]] = edge
+                if edge[src_i] not in doomed:
+                    incoming.append(edge)
+
+        for edge in dead.values():
+            if edge[src_i] not in doomed:
+                self.out_edges[edge[src_i]].remove(edge)
+            if edge[tgt_i] not in doomed:
+                self.in_edges[edge[tgt_i]].remove(edge)
+
+        if dead:
+            self.edges = [e for e in self.edges if e[id_i] not in dead]
+            self.edge_ids.difference_update(dead)
+            self._first_relations.clear()
+
+        return incoming
+
+    def add_nodes_for_file(self, module_path: str, rows: List[_Record]) -> None:
+        """
+        Insert one module's node records and index just those rows.
+        """
+        index = self.node_field_index
+        id_i = index["id"]
+        qname_i = index["qualified_name"]
+        name_i = index["name"]
+
+        file_ids = self.nodes_by_file[module_path]
+
+        for row in rows:
+            nid = row[id_i]
+            self.nodes[nid] = row
+            file_ids.append(nid)
+
+            if row[qname_i]:
+                self.by_qname[row[qname_i]] = nid
+            if row[name_i]:
+                self.by_name[row[name_i]].append(nid)
+
+        ranges = _group_symbol_ranges(
+            [row[id_i] for row in rows],
+            [module_path] * len(rows),
+            [row[index["lineno"]] for row in rows],
+            [row[index["end_lineno"]] for row in rows],
+        ).get(module_path)
+
+        if ranges:
+            ranges = self.symbols_by_file.get(module_path, []) + ranges
+            ranges.sort(key=itemgetter(0))
+            self.symbols_by_file[module_path] = ranges
+            self.symbol_ranges[module_path] = _SymbolRanges(ranges)
+
+    def add_edges(self, edges: List[_Record]) -> None:
+        """
+        Append edge records not already present and link them into adjacency.
+        """
+        index = self.edge_field_index
+        id_i = index["id"]
+        src_i = index["source"]
+        tgt_i = index["target"]
+
+        for edge in edges:
+            if edge[id_i] in self.edge_ids:
+                continue
+            self.edge_ids.add(edge[id_i])
+            self.edges.append(edge)
+            self.out_edges[edge[src_i]].append(edge)
+            self.in_edges[edge[tgt_i]].append(edge)
+
+        self._first_relations.clear()
+
 
 # ==============================================================================
 # GraphBuilder
@@ -46,6 +903,14 @@ class GraphBuilder:
         self.filesystem = _Graph()
         self.ast = _Graph()
 
+        # Scan configuration of the last AST build, reused by refresh()
+        self._ast_roots: List[Path] = []
+        self._ast_ignore_file: Optional[Path] = None
+
+        # module_path -> relation targets that did not resolve, so a
+        # refresh defining one of them can re-scan the modules naming it
+        self._ast_unresolved: Dict[str, Set[str]] = {}
+
     # =====================================================
     # BUILD
     # =====================================================
@@ -57,11 +922,14 @@ class GraphBuilder:
         *,
         include_filesystem: bool = False,
         include_ast: bool = True,
+        collect_size: bool = True,
     ):
         self.reset()
 
         if include_filesystem:
-            scanner = Scanner(roots, ignore_file=ignore_file)
+            scanner = Scanner(
+                roots, ignore_file=ignore_file, collect_size=collect_size
+            )
             self.filesystem.node_schema = Scanner.NODE_SCHEMA
             self.filesystem.edge_schema = Scanner.EDGE_SCHEMA
             scanner.scan_into(self.filesystem)
@@ -72,12 +940,57 @@ class GraphBuilder:
             self.ast.edge_schema = AstScanner.EDGE_SCHEMA
             scanner.scan_into(self.ast)
 
+            self._ast_roots = scanner.root
+            self._ast_ignore_file = ignore_file
+            self._ast_unresolved = scanner.unresolved
+
         self._build_indexes()
         return self
 
     def has_ast(self) -> bool:
         return bool(self.ast.nodes)
 
+    # =====================================================
+    # SOURCE
+    # =====================================================
+
+    def extract_node_source(self, root: Union[str, Path], node_id: str) -> Optional[str]:
+        """
+        Return the source lines spanned by an AST node, or None.
+        """
+        node = self.ast.nodes.get(node_id)
+        if node is None:
+            return None
+
+        module_path = node.get("module_path")
+        try:
+            start = int(node.get("lineno"))
+            end = int(node.get("end_lineno"))
+        except (TypeError, ValueError):
+            return None
+
+        if not module_path or start < 1 or end < start:
+            return None
+
+        file_path = Path(root) / module_path
+        try:
+            stat = file_path.stat()
+            offsets = _line_offsets(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+            line_count = len(offsets) - 1
+            if start > line_count:
+                return None
+
+            # Read just the span; the file is closed again right away
+            end = min(end, line_count)
+            with file_path.open("rb") as f:
+                f.seek(offsets[start - 1])
+                data = f.read(offsets[end] - offsets[start - 1])
+        except (OSError, ValueError):
+            return None
+
+        return data.decode("utf-8", errors="replace")
+
     # =====================================================
     # EXPORT
     # =====================================================
@@ -97,55 +1010,78 @@ class GraphBuilder:
         edges_path = prefix.with_name(prefix.name + "_edges.csv")
         json_path = prefix.with_name(prefix.name + ".json")
 
-        # ---- CSV NODES ----
-        with nodes_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
+        # Rows are records laid out in schema order, so they can be
+        # handed to the writers as-is.
+        graph.compact()
 
-            # Write schema comments
-            for name, desc in graph.node_schema:
-                f.write(f"# {name}: {desc}\n")
+        # ---- CSV NODES / EDGES ----
+        for path, schema, rows in (
+            (nodes_path, graph.node_schema, graph.nodes.values()),
+            (edges_path, graph.edge_schema, graph.edges),
+        ):
+            with path.open(
+                "w", newline="", encoding="utf-8", buffering=_COPY_BLOCK
+            ) as f:
+                writer = csv.writer(f, lineterminator="\n")
 
-            # Header
-            writer.writerow([name for name, _ in graph.node_schema])
+                # Schema comments in one write
+                f.write("".join(f"# {name}: {desc}\n" for name, desc in schema))
 
-            # Rows
-            for node in graph.nodes.values():
-                writer.writerow([node.get(name) for name, _ in graph.node_schema])
+                # Header
+                writer.writerow([name for name, _ in schema])
 
-        # ---- CSV EDGES ----
-        with edges_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
+                # Rows
+                writer.writerows(rows)
 
-            for name, desc in graph.edge_schema:
-                f.write(f"# {name}: {desc}\n")
+        # ---- JSON ----
+        with json_path.open("wb", buffering=_COPY_BLOCK) as f:
+            _write_json_graph(f, graph)
 
-            writer.writerow([name for name, _ in graph.edge_schema])
+    def export_parquet(
+        self, output_prefix: Union[str, Path], *, target: str = "ast"
+    ) -> None:
+        """
+        Write `<prefix>_nodes.parquet` and `<prefix>_edges.parquet`.
 
-            for edge in graph.edges:
-                writer.writerow([edge.get(name) for name, _ in graph.edge_schema])
+        Schema descriptions are kept as field metadata, and the repeated
+        string columns are dictionary-encoded. Requires pyarrow.
+        """
+        if target not in ("ast", "filesystem"):
+            raise ValueError("target must be 'ast' or 'filesystem'")
 
-        # ---- JSON ----
-        data = {
-            "node_schema": [
-                {"name": name, "description": desc}
-                for name, desc in graph.node_schema
-            ],
-            "edge_schema": [
-                {"name": name, "description": desc}
-                for name, desc in graph.edge_schema
-            ],
-            "nodes": [
-                [node.get(name) for name, _ in graph.node_schema]
-                for node in graph.nodes.values()
-            ],
-            "edges": [
-                [edge.get(name) for name, _ in graph.edge_schema]
-                for edge in graph.edges
-            ],
-        }
+        pa, pq = _require_pyarrow()
 
-        with json_path.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        graph = getattr(self, target)
+        graph.compact()
+
+        prefix = Path(output_prefix).with_suffix("")
+        prefix.parent.mkdir(parents=True, exist_ok=True)
+
+        for schema, rows, suffix in (
+            (graph.node_schema, list(graph.nodes.values()), "_nodes.parquet"),
+            (graph.edge_schema, graph.edges, "_edges.parquet"),
+        ):
+            columns = list(zip(*rows)) or [()] * len(schema)
+            fields = []
+            arrays = []
+
+            for (name, desc), column in zip(schema, columns):
+                try:
+                    values = pa.array(column) if column else pa.array([], pa.string())
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    # Mixed cell types (e.g. refreshed ints next to CSV strings)
+                    values = pa.array([None if v is None else str(v) for v in column])
+
+                arrays.append(values)
+                fields.append(pa.field(name, values.type, metadata={"description": desc}))
+
+            table = pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+            pq.write_table(
+                table,
+                prefix.with_name(prefix.name + suffix),
+                compression="zstd",
+                use_dictionary=[n for n, _ in schema if n in _INTERNED_FIELDS],
+            )
 
     def export_context_merged(
             self,
@@ -177,20 +1113,23 @@ class GraphBuilder:
                 ("AST EDGES", ast_edges_path),
             ])
 
-        with output_path.open("w", encoding="utf-8") as out:
+        rule = ("# " + "=" * 78 + "\n").encode("utf-8")
+
+        with output_path.open("wb", buffering=_COPY_BLOCK) as out:
             for title, path in sections:
-                out.write("# " + "=" * 78 + "\n")
-                out.write(f"# {title}\n")
-                out.write("# " + "=" * 78 + "\n\n")
+                out.write(rule)
+                out.write(f"# {title}\n".encode("utf-8"))
+                out.write(rule + b"\n")
 
                 if not path.exists():
-                    out.write(f"# Missing file: {path}\n\n")
+                    out.write(f"# Missing file: {path}\n\n".encode("utf-8"))
                     continue
 
-                with path.open("r", encoding="utf-8") as f:
-                    content = f.read().strip()
-                    out.write(content)
-                    out.write("\n\n")
+                with path.open("rb") as f:
+                    start, end = _stripped_span(f, os.fstat(f.fileno()).st_size)
+                    _copy_range(out, f, start, end - start)
+
+                out.write(b"\n\n")
 
     def export_ast_mermaid(
             self,
@@ -202,30 +1141,40 @@ class GraphBuilder:
     ) -> Path:
         output_path = Path(output_path)
 
+        graph = self.ast
+        graph.compact()
+
+        # Field positions are resolved once; rows are then read by column
+        kinds, names, qnames, signatures, module_paths = graph.node_columns(
+            "kind", "name", "qualified_name", "signature", "module_path"
+        )
+
         nodes: Dict[str, dict] = {}
-        for nid, node in self.ast.nodes.items():
+        for nid, kind, name, qname, signature, module_path in zip(
+            graph.nodes, kinds, names, qnames, signatures, module_paths
+        ):
             if module_path_filter:
-                module_path = node.get("module_path", "")
-                if module_path_filter not in Path(module_path).as_posix():
+                if module_path_filter not in Path(module_path or "").as_posix():
                     continue
 
             nodes[nid] = {
-                "kind": node.get("kind", ""),
-                "name": node.get("name", ""),
-                "qname": node.get("qualified_name", ""),
-                "signature": node.get("signature", ""),
+                "kind": kind or "",
+                "name": name or "",
+                "qname": qname or "",
+                "signature": signature or "",
             }
 
         edges: List[Tuple[str, str, str]] = []
-        for edge in self.ast.edges:
-            src = edge.get("source")
-            tgt = edge.get("target")
-            rel = edge.get("relation")
-            if not src or not tgt or not rel:
-                continue
-            if src not in nodes or tgt not in nodes:
-                continue
-            edges.append((src, tgt, rel))
+        if graph.edges:
+            index = graph.edge_field_index
+            triple = itemgetter(index["source"], index["target"], index["relation"])
+
+            for src, tgt, rel in map(triple, graph.edges):
+                if not src or not tgt or not rel:
+                    continue
+                if src not in nodes or tgt not in nodes:
+                    continue
+                edges.append((src, tgt, rel))
 
         uml = self._ast_to_mermaid(nodes, edges, show_private=show_private)
 
@@ -352,65 +1301,128 @@ class GraphBuilder:
     # LOAD
     # =====================================================
 
-    def load(self, nodes_path: Path, edges_path: Optional[Path] = None, *, target: str = "ast"):
+    def load(
+        self,
+        nodes_path: Path,
+        edges_path: Optional[Path] = None,
+        *,
+        target: str = "ast",
+        cache: bool = False,
+    ):
+        """
+        Load an exported graph into `target`.
 
+        With `cache=True` the parsed and indexed graph is pickled to a
+        sidecar in the user cache directory, keyed by the target and the
+        inputs' path, mtime and size, and reused by later loads of unchanged files.
+        """
         if target not in ("ast", "filesystem"):
             raise ValueError("target must be 'ast' or 'filesystem'")
 
+        cache_path = (
+            _load_cache_path(target, nodes_path, edges_path) if cache else None
+        )
+
+        if cache_path is not None and cache_path.exists():
+            try:
+                with cache_path.open("rb") as f:
+                    setattr(self, target, pickle.load(f))
+                return self
+            except Exception:
+                # Stale or unreadable sidecar: fall back to a fresh load
+                pass
+
         graph = getattr(self, target)
         graph.__init__()
 
         if nodes_path.suffix == ".json":
             self._load_json(nodes_path, graph)
+        elif nodes_path.suffix == ".parquet":
+            self._load_parquet(nodes_path, edges_path, graph)
         else:
             self._load_nodes_csv(nodes_path, graph)
             if edges_path:
                 self._load_edges_csv(edges_path, graph)
 
-        self._build_indexes()
+        self._build_indexes((graph,))
+
+        if cache_path is not None:
+            self._write_load_cache(cache_path, graph)
+
         return self
 
-    def _load_nodes_csv(self, path: Path, graph: _Graph):
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.reader(f)
+    @staticmethod
+    def _write_load_cache(cache_path: Path, graph: _Graph) -> None:
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            with tmp_path.open("wb") as f:
+                pickle.dump(graph, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The cache is best-effort; the loaded graph is already in place
+            pass
 
-            # Skip comment lines
-            for row in reader:
-                if not row or row[0].startswith("#"):
-                    continue
-                header = row
-                break
+    @staticmethod
+    def _read_parquet(path: Path):
+        """
+        Return ([(name, description)], row iterator) for a Parquet export.
+        """
+        _, pq = _require_pyarrow()
 
-            graph.node_schema = [(name, "") for name in header]
+        table = pq.read_table(path)
+        schema = [
+            (field.name, (field.metadata or {}).get(b"description", b"").decode("utf-8"))
+            for field in table.schema
+        ]
+        columns = [table.column(name).to_pylist() for name, _ in schema]
+        return schema, zip(*columns)
 
-            for row in reader:
-                if not row:
-                    continue
-                node = dict(zip(header, row))
-                graph.nodes[node["id"]] = node
+    def _load_parquet(self, nodes_path: Path, edges_path: Optional[Path], graph: _Graph):
+        graph.node_schema, rows = self._read_parquet(nodes_path)
+        graph.set_nodes(map(list, rows))
 
-    def _load_edges_csv(self, path: Path, graph: _Graph):
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.reader(f)
+        if edges_path:
+            graph.edge_schema, rows = self._read_parquet(edges_path)
+            graph.set_edges(map(list, rows))
 
-            for row in reader:
-                if not row or row[0].startswith("#"):
-                    continue
-                header = row
-                break
+    @staticmethod
+    def _read_csv_schema(f) -> List[Tuple[str, str]]:
+        """
+        Consume the leading '# name: description' comments and the header
+        row, leaving `f` positioned at the first data row.
+        """
+        descriptions: Dict[str, str] = {}
 
-            graph.edge_schema = [(name, "") for name in header]
+        line = f.readline()
+        while line and (line.startswith("#") or not line.strip()):
+            name, sep, desc = line[1:].partition(":")
+            if line.startswith("#") and sep:
+                descriptions[name.strip()] = desc.strip()
+            line = f.readline()
 
-            for row in reader:
-                if not row:
-                    continue
-                edge = dict(zip(header, row))
-                graph.edges.append(edge)
-                graph.edge_ids.add(edge["id"])
+        if not line:
+            raise ValueError(f"CSV header not found in {f.name}")
+
+        header = next(csv.reader([line]))
+        return [(name, descriptions.get(name, "")) for name in header]
+
+    def _load_nodes_csv(self, path: Path, graph: _Graph):
+        with path.open("r", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            graph.node_schema = self._read_csv_schema(f)
+            graph.set_nodes(filter(None, csv.reader(f)))
+
+    def _load_edges_csv(self, path: Path, graph: _Graph):
+        with path.open("r", newline="", encoding="utf-8", buffering=1 << 20) as f:
+            graph.edge_schema = self._read_csv_schema(f)
+            graph.set_edges(filter(None, csv.reader(f)))
 
     def _load_json(self, path: Path, graph: _Graph):
-        with path.open("r", encoding="utf-8") as f:
-            data = json.load(f)
+        if orjson is not None:
+            data = orjson.loads(path.read_bytes())
+        else:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
 
         graph.node_schema = [
             (x["name"], x.get("description", ""))
@@ -422,60 +1434,197 @@ class GraphBuilder:
             for x in data["edge_schema"]
         ]
 
-        for row in data["nodes"]:
-            node = dict(zip([n for n, _ in graph.node_schema], row))
-            graph.nodes[node["id"]] = node
-
-        for row in data["edges"]:
-            edge = dict(zip([n for n, _ in graph.edge_schema], row))
-            graph.edges.append(edge)
-            graph.edge_ids.add(edge["id"])
+        graph.set_nodes(data["nodes"])
+        graph.set_edges(data["edges"])
 
     # =====================================================
     # INDEXING
     # =====================================================
 
-    def _build_indexes(self):
+    def _build_indexes(self, targets: Optional[Tuple[_Graph, ...]] = None):
+        """
+        Rebuild adjacency (and, for the AST graph, semantic) indexes.
+
+        `targets` limits the work to the given graphs; default is both.
+        """
+        graphs = targets or (self.filesystem, self.ast)
+
+        for graph in graphs:
+            graph.compact()
+
+        # Every task fills its own index, so they can run concurrently
+        tasks = [graph.rebuild_adjacency for graph in graphs]
+
+        if self.ast in graphs:
+            tasks.extend(self._semantic_index_tasks())
 
-        for graph in (self.filesystem, self.ast):
-            graph.out_edges.clear()
-            graph.in_edges.clear()
+        _run_tasks(tasks)
 
-            for edge in graph.edges:
-                graph.out_edges[edge["source"]].append(edge)
-                graph.in_edges[edge["target"]].append(edge)
+    def _semantic_index_tasks(self) -> List:
+        """
+        Reset the AST semantic indexes and return callables refilling them.
+        """
+        ast = self.ast
+        ast.by_qname.clear()
+        ast.by_name.clear()
+        ast.symbols_by_file.clear()
+        ast.nodes_by_file.clear()
+        ast.symbol_ranges.clear()
+
+        node_ids = list(ast.nodes)
+        qnames, names, module_paths, starts, ends = ast.node_columns(
+            "qualified_name", "name", "module_path", "lineno", "end_lineno"
+        )
+
+        def index_qnames():
+            for nid, qname in zip(node_ids, qnames):
+                if qname:
+                    ast.by_qname[qname] = nid
+
+        def index_names():
+            for nid, name in zip(node_ids, names):
+                if name:
+                    ast.by_name[name].append(nid)
+
+        def index_files():
+            for nid, module_path in zip(node_ids, module_paths):
+                if module_path:
+                    ast.nodes_by_file[module_path].append(nid)
+
+        def index_ranges():
+            ranges_by_file = _group_symbol_ranges(node_ids, module_paths, starts, ends)
+
+            for file, ranges in ranges_by_file.items():
+                ranges.sort(key=itemgetter(0))
+                ast.symbols_by_file[file] = ranges
+                ast.symbol_ranges[file] = _SymbolRanges(ranges)
+
+        return [index_qnames, index_names, index_files, index_ranges]
+
+    def refresh(
+        self,
+        changed_files: List[Path],
+        roots: Optional[List[Path]] = None,
+        ignore_file: Optional[Path] = None,
+    ) -> None:
+        """
+        Re-scan changed (or deleted) .py files into the AST graph.
 
-        # AST semantic indexing
-        self.ast.by_qname.clear()
-        self.ast.by_name.clear()
-        self.ast.symbols_by_file.clear()
+        Only the affected modules are dropped and re-indexed; the rest of
+        the graph and its indexes are left untouched. `roots` defaults to
+        the roots of the last build().
 
-        for nid, node in self.ast.nodes.items():
-            qname = node.get("qualified_name")
-            name = node.get("name")
-            module_path = node.get("module_path")
-            lineno = node.get("lineno")
-            end_lineno = node.get("end_lineno")
+        Untouched modules whose imports or calls named a symbol the
+        refresh now defines are re-scanned as well, so their edges match
+        a full rebuild. That bookkeeping comes from build(); on a loaded
+        graph only the given files are re-scanned.
+        """
+        if roots is not None:
+            scanner = AstScanner(roots, ignore_file=ignore_file)
+        elif self._ast_roots:
+            scanner = AstScanner(self._ast_roots, ignore_file=self._ast_ignore_file)
+        else:
+            raise ValueError("refresh() needs roots when the graph was not built")
 
-            if qname:
-                self.ast.by_qname[qname] = nid
+        ast = self.ast
+        if not ast.node_schema:
+            ast.node_schema = AstScanner.NODE_SCHEMA
+            ast.edge_schema = AstScanner.EDGE_SCHEMA
 
-            if name:
-                self.ast.by_name[name].append(nid)
+        py_paths = []
+        module_paths = set()
 
-            if module_path and lineno and end_lineno:
-                try:
-                    start = int(lineno)
-                    end = int(end_lineno)
-                    self.ast.symbols_by_file[module_path].append((start, end, nid))
-                except Exception:
-                    pass
+        for path in changed_files:
+            path = Path(path).resolve()
+            if path.suffix != ".py":
+                continue
 
-        for file in self.ast.symbols_by_file:
-            self.ast.symbols_by_file[file].sort(key=lambda x: x[0])
+            root = scanner._root_of(path)
+            if root is None:
+                continue
+
+            module_paths.add(os.path.normpath(os.path.relpath(path, root)))
+            if path.is_file():
+                py_paths.append(path)
+
+        if not module_paths:
+            return
+
+        qname_i = ast.node_field_index["qualified_name"]
+        old_qnames = {}
+        for module_path in module_paths:
+            for nid in ast.nodes_by_file.get(module_path, ()):
+                old_qnames[nid] = ast.nodes[nid][qname_i]
+
+        incoming = []
+        for module_path in module_paths:
+            incoming.extend(ast.remove_file(module_path))
+            self._ast_unresolved.pop(module_path, None)
+
+        # Scan into a scratch graph, then merge just the new rows
+        delta = _Graph()
+        delta.node_schema = ast.node_schema
+        delta.edge_schema = ast.edge_schema
+        scanner.scan_files_into(delta, py_paths, known_symbols=dict(ast.by_qname))
+        delta.compact()
+        self._ast_unresolved.update(scanner.unresolved)
+
+        module_path_i = delta.node_field_index["module_path"]
+        rows_by_file = defaultdict(list)
+        for row in delta.nodes.values():
+            rows_by_file[row[module_path_i]].append(row)
+
+        for module_path, rows in rows_by_file.items():
+            ast.add_nodes_for_file(module_path, rows)
+
+        ast.add_edges(delta.edges)
+
+        # Edges from untouched modules survive if their target came back;
+        # the others now name a missing symbol
+        src_i = ast.edge_field_index["source"]
+        target_i = ast.edge_field_index["target"]
+
+        restored = []
+        for edge in incoming:
+            # remove_file() only excludes its own module's sources; edges
+            # from any refreshed module were re-derived by the scan above
+            if edge[src_i] in old_qnames:
+                continue
+
+            if edge[target_i] in ast.nodes:
+                restored.append(edge)
+                continue
+
+            source = ast.nodes.get(edge[src_i])
+            if source is not None:
+                self._ast_unresolved.setdefault(source[module_path_i], set()).add(
+                    old_qnames[edge[target_i]]
+                )
+
+        ast.add_edges(restored)
+
+        # Modules naming a newly defined symbol need their edges redone
+        new_qnames = {row[qname_i] for row in delta.nodes.values()}
+        new_qnames.difference_update(old_qnames.values())
+
+        dependents = [
+            module_path
+            for module_path, missing in self._ast_unresolved.items()
+            if module_path not in module_paths and not missing.isdisjoint(new_qnames)
+        ]
+
+        dependent_paths = [
+            root / module_path
+            for module_path in dependents
+            for root in scanner.root
+            if (root / module_path).is_file()
+        ]
+
+        if dependent_paths:
+            self.refresh(dependent_paths, roots, ignore_file)
 
     def _remove_nodes_by_predicate(self, graph: _Graph, predicate):
-        to_delete = [nid for nid, node in graph.nodes.items() if predicate(node)]
+        to_delete = {nid for nid, node in graph.nodes.items() if predicate(node)}
 
         if not to_delete:
             return
@@ -485,16 +1634,28 @@ class GraphBuilder:
             graph.nodes.pop(nid, None)
 
         # Remove edges touching deleted nodes
+        index = graph.edge_field_index
+        src_i = index["source"]
+        tgt_i = index["target"]
+        id_i = index["id"]
+
         graph.edges = [
             e for e in graph.edges
-            if e["source"] not in to_delete and e["target"] not in to_delete
+            if e[src_i] not in to_delete and e[tgt_i] not in to_delete
         ]
 
         graph.edge_ids = {
-            e["id"] for e in graph.edges
+            e[id_i] for e in graph.edges
         }
 
     def remove_paths(self, paths: List[Path]):
+        """
+        Drop files or directories deleted from disk from both graphs.
+
+        AST modules are matched by their path relative to the build
+        roots and removed through refresh(), so edges into them are
+        tracked for a later re-add.
+        """
 
         paths = [Path(p).resolve() for p in paths]
 
@@ -520,17 +1681,32 @@ class GraphBuilder:
             return False
 
         self._remove_nodes_by_predicate(self.filesystem, fs_match)
-
-        # AST graph
-        def ast_match(node):
-            module_path = node.get("module_path")
-            if not module_path:
-                return False
-            return any(module_path.endswith(str(p.name)) for p in paths)
-
-        self._remove_nodes_by_predicate(self.ast, ast_match)
-
-        self._build_indexes()
+        self._build_indexes((self.filesystem,))
+
+        # AST graph: drop modules by root-relative module path
+        if self._ast_roots:
+            doomed = []
+            for root in self._ast_roots:
+                for p in paths:
+                    if p != root and root not in p.parents:
+                        continue
+                    rel = os.path.relpath(p, root)
+                    doomed.extend(
+                        root / module_path
+                        for module_path in self.ast.nodes_by_file
+                        if rel == "." or module_path == rel
+                        or module_path.startswith(rel + os.sep)
+                    )
+
+            if doomed:
+                self.refresh(doomed)
+        else:
+            # Loaded graph: the scan root is unknown, so only deleted
+            # files whose path ends in a whole module path can be matched
+            for module_path in list(self.ast.nodes_by_file):
+                tail = os.sep + module_path
+                if any(str(p).endswith(tail) for p in paths):
+                    self.ast.remove_file(module_path)
 
     def update_filesystem_paths(
             self,
@@ -540,6 +1716,11 @@ class GraphBuilder:
 
         paths = [Path(p).resolve() for p in paths]
 
+        fs = self.filesystem
+        if not fs.node_schema:
+            fs.node_schema = Scanner.NODE_SCHEMA
+            fs.edge_schema = Scanner.EDGE_SCHEMA
+
         # Remove old versions first
         def match(node):
             abs_path = node.get("abs_path")
@@ -554,31 +1735,4 @@ class GraphBuilder:
 
         scanner.scan_into(self.filesystem)
 
-        self._build_indexes()
-
-    def update_ast_paths(
-            self,
-            paths: List[Path],
-            ignore_file=None,
-    ):
-
-        py_paths = [Path(p).resolve() for p in paths if Path(p).suffix == ".py"]
-
-        if not py_paths:
-            return
-
-        # Remove old AST nodes for these modules
-        def match(node):
-            module_path = node.get("module_path")
-            if not module_path:
-                return False
-            return any(module_path.endswith(p.name) for p in py_paths)
-
-        self._remove_nodes_by_predicate(self.ast, match)
-
-        # Re-scan only changed Python files
-        scanner = AstScanner(py_paths, ignore_file=ignore_file)
-
-        scanner.scan_into(self.ast)
-
-        self._build_indexes()
+        self._build_indexes((self.filesystem,))
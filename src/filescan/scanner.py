@@ -1,5 +1,8 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple, Union
 
 from .base import ScannerBase
 from .utils import load_ignore_spec
@@ -21,6 +24,28 @@ class Scanner(ScannerBase):
         ("relation", "Edge relation type"),
     ]
 
+    # Prefetch child listings only when a directory has more than this
+    # many subdirectories; shallow fan-out is cheaper inline.
+    FANOUT_MIN_DIRS = 4
+
+    def __init__(
+        self,
+        root: Union[str, Path, List[Union[str, Path]]],
+        ignore_file: Optional[Union[str, Path]] = None,
+        *,
+        workers: Optional[int] = None,
+        collect_size: bool = True,
+    ):
+        super().__init__(root, ignore_file)
+
+        # False skips the per-file stat; size is then reported as None
+        self.collect_size = collect_size
+
+        # Threads for directory listing / stat prefetch; <= 1 disables
+        self.workers = (
+            workers if workers is not None else min(8, os.cpu_count() or 1)
+        )
+
     # -------------------------------------------------
     # Public
     # -------------------------------------------------
@@ -33,29 +58,53 @@ class Scanner(ScannerBase):
         if self._ignore_spec is None and self.ignore_file is not None:
             self._ignore_spec = load_ignore_spec(self.ignore_file)
 
-        for root in self.root:
-            self._walk(graph, root, root=root, parent_id=None)
+        if self.workers <= 1:
+            for root in self.root:
+                self._walk(graph, root, None)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for root in self.root:
+                self._walk(graph, root, pool)
 
     # -------------------------------------------------
     # Canonical Identity
     # -------------------------------------------------
 
-    def _canonical_key(self, path: Path, root: Path) -> str:
+    @staticmethod
+    def _canonical_key(root_name: str, rel_str: str) -> str:
         """
-        Logical identity of node.
+        Logical identity of node, from its root-relative POSIX path.
+
+        Roots are resolved once in ScannerBase and the walk only ever
+        appends child names, so no per-node resolve() is needed.
         """
-        root = root.resolve()
-        path = path.resolve()
+        if not rel_str:
+            return root_name
 
-        root_name = root.name or "root"
+        return f"{root_name}/{rel_str}"
 
-        if path == root:
-            return root_name
+    def _resolved_identity(
+        self, path: Path, root: Path, root_name: str, rel_str: str
+    ) -> Tuple[str, str]:
+        """
+        (canonical key, abs_path) for a node reached through a symlink.
+
+        Such nodes are identified by their resolved location, so a link
+        and its in-root target share one node. Targets outside the root
+        keep the link's own key.
+        """
+        real = path.resolve()
 
-        rel = path.relative_to(root)
-        rel_str = str(rel).replace("\\", "/")
+        if real == root:
+            return root_name, real.as_posix()
 
-        return f"{root_name}/{rel_str}"
+        try:
+            key_rel = real.relative_to(root).as_posix()
+        except ValueError:
+            key_rel = rel_str
+
+        return self._canonical_key(root_name, key_rel), real.as_posix()
 
     # -------------------------------------------------
     # Internal Walk
@@ -64,68 +113,155 @@ class Scanner(ScannerBase):
     def _walk(
         self,
         graph,
-        path: Path,
         root: Path,
-        parent_id: Optional[str],
+        pool: Optional[ThreadPoolExecutor],
     ) -> None:
+        """
+        Depth-first walk of one root using an explicit stack.
 
-        # Ignore (except root)
-        if parent_id is not None and self._is_ignored(path):
-            return
+        Children are pushed in reverse sorted order, so nodes and edges
+        come out in the same pre-order a recursive walk would produce,
+        without the recursion limit on deep trees.
+
+        With a pool, wide directories have their subdirectory listings
+        (and file stats) fetched on worker threads ahead of the walk;
+        graph writes stay on this thread, so output order is unchanged.
+        """
+        # Hot-loop bindings: add_node / add_edge / _is_ignored are inlined
+        # below.
+        spec = self._ignore_spec
+        match_file = spec.match_file if spec is not None else None
+        canonical_key_of = self._canonical_key
+        root_name = root.name or "root"
+        root_posix = root.as_posix().rstrip("/")
+        make_node, make_edge = self.row_builders(graph)
+        nodes = graph.nodes
+        edge_ids = graph.edge_ids
+        append_edge = graph.edges.append
+        new_node_id = self.generate_node_id
+        new_edge_id = self.generate_edge_id
+        fanout_min = self.FANOUT_MIN_DIRS
+        collect_size = self.collect_size
 
-        canonical_key = self._canonical_key(path, root)
-        is_dir = path.is_dir()
+        # (entry, root-relative path, parent_id, is_dir, under a symlink,
+        #  prefetched listing); the root is the only entry-less item
+        stack: List[Tuple[Optional[os.DirEntry], str, Optional[str], bool, bool, Optional[Future]]] = [
+            (None, "", None, root.is_dir(), False, None)
+        ]
+        pop = stack.pop
+        push = stack.extend
 
-        size: Optional[int] = None
-        if not is_dir:
-            try:
-                size = path.stat().st_size
-            except OSError:
-                pass
+        while stack:
+            entry, rel_str, parent_id, is_dir, linked, listing = pop()
 
-        abs_path = str(path.resolve().as_posix())
+            if entry is not None and not linked:
+                linked = entry.is_symlink()
 
-        # ---- Add node ----
-        node_payload = {
-            "type": "d" if is_dir else "f",
-            "name": path.name,
-            "abs_path": abs_path,
-            "size": size,
-        }
+            if linked:
+                canonical_key, abs_path = self._resolved_identity(
+                    Path(entry.path), root, root_name, rel_str
+                )
+            else:
+                canonical_key = canonical_key_of(root_name, rel_str)
+                abs_path = f"{root_posix}/{rel_str}" if rel_str else root.as_posix()
 
-        node_id = self.add_node(
-            graph,
-            canonical_key,
-            node_payload,
-        )
+            size: Optional[int] = None
+            if collect_size and not is_dir:
+                try:
+                    size = (entry or root).stat().st_size
+                except OSError:
+                    pass
 
-        # ---- Add containment edge ----
-        if parent_id is not None:
-            edge_key = f"{parent_id}|contains|{node_id}"
+            # ---- Add node (values in NODE_SCHEMA order) ----
+            node_id = new_node_id(canonical_key)
 
-            edge_payload = {
-                "source": parent_id,
-                "target": node_id,
-                "relation": "contains",
-            }
+            if node_id not in nodes:
+                nodes[node_id] = make_node([
+                    node_id,
+                    "d" if is_dir else "f",
+                    entry.name if entry is not None else root.name,
+                    abs_path,
+                    size,
+                ])
 
-            self.add_edge(graph, edge_key, edge_payload)
+            # ---- Add containment edge ----
+            if parent_id is not None:
+                edge_key = f"{parent_id}|contains|{node_id}"
+                edge_id = new_edge_id(edge_key)
 
-        if not is_dir:
-            return
+                if edge_id not in edge_ids:
+                    edge_ids.add(edge_id)
+                    append_edge(make_edge([edge_id, parent_id, node_id, "contains"]))
 
-        try:
-            children = sorted(
-                path.iterdir(),
-                key=lambda p: (not p.is_dir(), p.name.lower()),
+            if not is_dir:
+                continue
+
+            if listing is not None:
+                children = listing.result()
+            else:
+                children = _list_dir(entry.path if entry is not None else root)
+            if children is None:
+                continue
+
+            # Ignore rules are applied here, before anything is queued, so
+            # an ignored directory's subtree is never listed or matched
+            prefix = rel_str + "/" if rel_str else ""
+            kept = []
+            for child, child_is_dir in children:
+                child_rel = prefix + child.name
+                if match_file is None or not match_file(
+                    child_rel + "/" if child_is_dir else child_rel
+                ):
+                    kept.append((child, child_rel, child_is_dir))
+
+            prefetch = pool is not None and sum(d for *_, d in kept) > fanout_min
+
+            push(
+                (
+                    child,
+                    child_rel,
+                    node_id,
+                    child_is_dir,
+                    linked,
+                    pool.submit(_list_dir, child.path, collect_size)
+                    if prefetch and child_is_dir else None,
+                )
+                for child, child_rel, child_is_dir in reversed(kept)
             )
+
+
+def _list_dir(
+    path: Union[str, Path], stat_files: bool = False
+) -> Optional[List[Tuple[os.DirEntry, bool]]]:
+    """
+    List a directory as sorted (entry, is_dir) pairs, directories first.
+
+    `stat_files` warms each file entry's cached stat, so the size lookup
+    on the walking thread needs no syscall. Returns None if unreadable.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+
+    # Decorate once: is_dir() and lower() run once per entry instead of
+    # once for the sort key and again for the listing.
+    keyed = []
+    for child in entries:
+        try:
+            is_dir = child.is_dir()
         except OSError:
-            return
+            is_dir = False
+
+        if stat_files and not is_dir:
+            try:
+                child.stat()
+            except OSError:
+                pass
+
+        keyed.append(((not is_dir, child.name.lower()), child, is_dir))
+
+    keyed.sort(key=itemgetter(0))
 
-        for child in children:
-            self._walk(
-                graph,
-                child,
-                root=root,
-                parent_id=node_id,
-            )
\ No newline at end of file
+    return [(child, is_dir) for _, child, is_dir in keyed]
@@ -1,8 +1,15 @@
+import heapq
 import os
 import subprocess
-import json
+import sys
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Read buffer for the rg pipe; fewer, larger reads for big match streams
+_PIPE_BUFFER = 1 << 20
 
 
 # -------------------------------------------------
@@ -19,6 +26,112 @@ PRIORITY = {
 }
 
 
+# -------------------------------------------------
+# Match record
+# -------------------------------------------------
+
+class Match(NamedTuple):
+    """
+    One search result.
+
+    A tuple instead of a per-match dict; mapping-style access
+    (`m["line"]`, `m.get("symbol")`, `"symbol" in m`) is kept for
+    existing callers. It is still a tuple for iteration, equality and
+    JSON; use `as_dict()` where a real dict is needed.
+    """
+
+    file: str
+    line: int
+    text: str
+    symbol_id: Optional[str]
+    symbol: Any
+    match_type: str
+
+    def __getitem__(self, key):
+        if key.__class__ is str:
+            key = _MATCH_INDEX[key]
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        index = _MATCH_INDEX.get(key)
+        if index is None:
+            return default
+        return tuple.__getitem__(self, index)
+
+    def __contains__(self, key) -> bool:
+        return key in _MATCH_INDEX
+
+    def keys(self):
+        return self._fields
+
+    def items(self):
+        return zip(self._fields, self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._fields, self))
+
+
+_MATCH_INDEX = {name: i for i, name in enumerate(Match._fields)}
+
+
+def _priority_key(r: Match) -> Tuple[int, str, int]:
+    return PRIORITY.get(r.match_type, 99), r.file, r.line
+
+
+def group_by_symbol(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group search results by (file, symbol_id).
+
+    Groups come back ordered by file, then symbol id (results without a
+    symbol first); matches within a group keep line order.
+    """
+    grouped: Dict[Tuple[str, Any], List[Dict[str, Any]]] = defaultdict(list)
+
+    for r in results:
+        grouped[r["file"], r.get("symbol_id")].append(r)
+
+    groups = []
+    for key in sorted(grouped, key=lambda k: (k[0], k[1] or "")):
+        matches = grouped[key]
+        matches.sort(key=itemgetter("line"))
+        groups.append({
+            "file": key[0],
+            "symbol_id": key[1],
+            "symbol": matches[0].get("symbol"),
+            "matches": matches,
+        })
+
+    return groups
+
+
+def _first_hit_matcher(
+    target_ids: frozenset,
+) -> Optional[Callable[[Dict], Optional[Tuple[int, str]]]]:
+    """
+    Build `relations -> first (position, relation) to any target`.
+
+    Specialized once per query: None without targets, a single dict
+    probe for the common one-target case.
+    """
+    if not target_ids:
+        return None
+
+    if len(target_ids) == 1:
+        (target,) = target_ids
+        return lambda relations: relations.get(target)
+
+    def first_hit(relations):
+        # Probe from the smaller side; the lowest position is the
+        # first matching edge in out_edges order
+        if len(target_ids) <= len(relations):
+            hits = [relations[t] for t in target_ids if t in relations]
+        else:
+            hits = [r for t, r in relations.items() if t in target_ids]
+        return min(hits) if hits else None
+
+    return first_hit
+
+
 class SearchEngine:
     """
     Hybrid search engine:
@@ -26,117 +139,280 @@ class SearchEngine:
     - AST graph for semantic enrichment
     """
 
-    def __init__(self, root: Path, ast_graph):
+    def __init__(
+        self,
+        root: Path,
+        ast_graph,
+        *,
+        threads: Optional[int] = None,
+        cache_size: int = 0,
+    ):
         """
-        ast_graph must be builder.ast
+        ast_graph must be builder.ast; `threads` is passed to rg
+        (default: one per CPU).
+
+        With `cache_size` > 0 the raw rg matches of that many recent
+        queries are kept in memory; call invalidate() when files change.
         """
         self.root = Path(root).resolve()
         self.graph = ast_graph
+        self.threads = threads or os.cpu_count() or 1
+
+        self._root_str = str(self.root)
+        self._root_prefix = os.path.join(self._root_str, "")
+
+        # Path normalization depends only on the raw rg path and the
+        # root, so it is memoized across searches on this engine
+        self._module_path_of = lru_cache(maxsize=8192)(self._module_path_of)
+
+        self._cache_size = cache_size
+        self._grep_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
 
     # -------------------------------------------------
     # Public API
     # -------------------------------------------------
 
-    def search(self, query: str) -> List[Dict[str, Any]]:
+    def search(self, query: str) -> List[Match]:
+        """
+        All results for `query`, ordered by semantic priority.
+        """
+        results = list(self.iter_search(query))
+        results.sort(key=_priority_key)
+        return results
 
-        matches = list(self._grep(query))
-        if not matches:
-            return []
+    def search_topk(self, query: str, k: int) -> List[Match]:
+        """
+        The first `k` results of `search(query)`.
 
-        results = []
+        Keeps a k-sized heap over the result stream instead of holding
+        and sorting every match.
+        """
+        return heapq.nsmallest(k, self.iter_search(query), key=_priority_key)
 
-        # Resolve semantic targets by symbol name
-        target_ids = set(self.graph.by_name.get(query, []))
+    def iter_search(self, query: str) -> Iterator[Match]:
+        """
+        Yield enriched results in ripgrep order as matches arrive.
 
-        for m in matches:
-            file_path = Path(m["file"]).resolve()
+        Nothing is buffered, so callers that do their own ordering (or
+        stop early) avoid holding every match at once.
+        """
+        # No AST layer: every match is unknown, skip symbol resolution
+        if not self.graph.nodes:
+            yield from self._iter_plain(query)
+            return
+
+        # Resolve semantic targets by symbol name; graph names are
+        # interned at load time, so an interned query hits by identity
+        target_ids = frozenset(self.graph.by_name.get(sys.intern(query), ()))
+        first_hit = _first_hit_matcher(target_ids)
+
+        # rg emits each file's matches together: resolve the path and
+        # fetch the file's symbol index once per file, not per match
+        files: Dict[str, Optional[Tuple[str, Callable]]] = {}
+        file_entry = self._file_entry
+
+        # Node row and relation depend only on the container, so each
+        # symbol is classified once per search however many lines hit it
+        containers: Dict[Optional[str], Tuple[Any, Optional[str]]] = {}
+        enrich = self._enrich
+
+        for m in self._matches(query):
+            file_raw = m["file"]
+            if file_raw not in files:
+                files[file_raw] = file_entry(file_raw)
+
+            entry = files[file_raw]
+            if entry is not None:
+                yield enrich(m, *entry, first_hit, containers)
+
+    def _iter_plain(self, query: str) -> Iterator[Match]:
+        """
+        Unenriched results, for graphs without any symbols.
+        """
+        module_path_of = self._module_path_of
 
-            try:
-                module_path = os.path.normpath(
-                    os.path.relpath(file_path, self.root)
-                )
-            except ValueError:
+        for m in self._matches(query):
+            resolved = module_path_of(m["file"])
+            if resolved is None:
                 continue
 
-            container_id = self._find_symbol_at(
-                module_path,
-                m["line"],
+            yield Match(
+                resolved[0], m["line"], m["text"].strip(), None, None, "unknown"
             )
 
-            container = (
-                self.graph.nodes.get(container_id)
-                if container_id
-                else None
-            )
+    def _file_entry(self, file_raw: str) -> Optional[Tuple[str, Callable]]:
+        """
+        (absolute path, line -> symbol id lookup) for an rg match file.
+        """
+        resolved = self._module_path_of(file_raw)
+        if resolved is None:
+            return None
+
+        file_path, module_path = resolved
+        return file_path, self.graph.symbol_lookup(module_path)
+
+    def _enrich(
+        self,
+        m: Dict[str, Any],
+        file_path: str,
+        symbol_at: Callable[[int], Optional[str]],
+        first_hit: Optional[Callable[[Dict], Optional[Tuple[int, str]]]],
+        containers: Dict[Optional[str], Tuple[Any, Optional[str]]],
+    ) -> Match:
+        """
+        Attach the enclosing symbol and match type to one grep match.
+
+        `containers` memoizes `_classify_container` for the current search.
+        """
+        container_id = symbol_at(m["line"])
 
-            match_type = "unknown"
-
-            # -------------------------------------------------
-            # 1️⃣ Definition
-            # -------------------------------------------------
-            if container and container.get("lineno"):
-                try:
-                    if int(container["lineno"]) == m["line"]:
-                        match_type = "definition"
-                except (ValueError, TypeError):
-                    pass
-
-            # -------------------------------------------------
-            # 2️⃣ Semantic relation
-            # -------------------------------------------------
-            if match_type == "unknown" and container_id and target_ids:
-                for edge in self.graph.out_edges.get(container_id, []):
-                    if edge["target"] in target_ids:
-                        match_type = edge.get("relation", "unknown")
-                        break
-
-            results.append({
-                "file": str(file_path),
-                "line": m["line"],
-                "text": m["text"].strip(),
-                "symbol_id": container_id,
-                "symbol": container,
-                "match_type": match_type,
-            })
-
-        results.sort(
-            key=lambda r: (
-                PRIORITY.get(r["match_type"], 99),
-                r["file"],
-                r["line"],
+        if container_id in containers:
+            container, relation = containers[container_id]
+        else:
+            container, relation = containers[container_id] = (
+                self._classify_container(container_id, first_hit)
             )
+
+        # -------------------------------------------------
+        # 1️⃣ Definition
+        # -------------------------------------------------
+        # Graph rows hold int line numbers (see graph_builder._INT_FIELDS)
+        if container is not None and container.get("lineno") == m["line"]:
+            match_type = "definition"
+
+        # -------------------------------------------------
+        # 2️⃣ Semantic relation
+        # -------------------------------------------------
+        else:
+            match_type = relation or "unknown"
+
+        return Match(
+            file_path,
+            m["line"],
+            m["text"].strip(),
+            container_id,
+            container,
+            match_type,
         )
 
-        return results
+    def _classify_container(
+        self,
+        container_id: Optional[str],
+        first_hit: Optional[Callable[[Dict], Optional[Tuple[int, str]]]],
+    ) -> Tuple[Any, Optional[str]]:
+        """
+        (node row, first relation to a target) for an enclosing symbol.
+        """
+        if not container_id:
+            return None, None
 
-    # -------------------------------------------------
-    # Symbol Resolver
-    # -------------------------------------------------
+        container = self.graph.nodes.get(container_id)
 
-    def _find_symbol_at(self, module_path: str, line: int) -> Optional[str]:
+        if first_hit is None:
+            return container, None
+
+        hit = first_hit(self.graph.relations_from(container_id))
+        return container, (hit[1] if hit is not None else None)
+
+    def _module_path_of(self, file_raw: str) -> Optional[Tuple[str, str]]:
+        """
+        (absolute path, root-relative module path) of an rg match file.
+
+        rg reports paths under the already-resolved root it was given,
+        so lexical normalization suffices; no per-file resolve().
+        """
+        root = self._root_str
+        prefix = self._root_prefix
 
-        candidates = []
+        # rg's usual output: an absolute path under the root, so the
+        # module path is a slice rather than a relpath() walk
+        if file_raw.startswith(prefix):
+            file_path = os.path.normpath(file_raw)
+            if file_path.startswith(prefix):
+                return file_path, file_path[len(prefix):]
 
-        for start, end, nid in self.graph.symbols_by_file.get(module_path, []):
-            if start <= line <= end:
-                candidates.append((end - start, nid))
+        file_path = os.path.normpath(os.path.join(root, file_raw))
 
-        if not candidates:
+        try:
+            module_path = os.path.relpath(file_path, root)
+        except ValueError:
             return None
 
-        return min(candidates)[1]
+        return file_path, module_path
 
     # -------------------------------------------------
     # Ripgrep Layer
     # -------------------------------------------------
 
-    def _grep(self, query: str):
+    def invalidate(self) -> None:
+        """
+        Drop cached rg matches, e.g. after the watched tree changed.
+        """
+        self._grep_cache.clear()
+
+    def _matches(self, query: str) -> Iterator[Dict[str, Any]]:
+        """
+        Raw rg matches for `query`, served from the cache when enabled.
+        """
+        if self._cache_size <= 0:
+            yield from self._grep(query)
+            return
+
+        cache = self._grep_cache
+        cached = cache.get(query)
+        if cached is not None:
+            cache.move_to_end(query)
+            yield from cached
+            return
+
+        matches = []
+        for m in self._grep(query):
+            matches.append(m)
+            yield m
+
+        # Only complete runs are cached; a closed generator stops above
+        cache[query] = matches
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+    def count(self, query: str) -> Dict[str, int]:
+        """
+        Number of matching lines per file; rg prints no line text.
+        """
+        counts = {}
+
+        for line in self._run_rg(["--count", "--with-filename"], query):
+            path, sep, n = line.rstrip(b"\r\n").partition(b"\0")
+            if sep and n.isdigit():
+                counts[os.fsdecode(path)] = int(n)
+
+        return counts
 
+    def files_matching(self, query: str) -> List[str]:
+        """
+        Files with at least one match; rg stops reading each at the first.
+        """
+        # With --null each path ends in NUL instead of a newline
+        out = b"".join(self._run_rg(["--files-with-matches"], query))
+        return [os.fsdecode(path) for path in out.split(b"\0") if path]
+
+    def _run_rg(self, args: List[str], query: str) -> Iterator[bytes]:
+        """
+        Run rg with `args` for `query` under the root; yield stdout lines.
+        """
+        # --no-config keeps a user's ripgreprc from changing the output
+        # format; --null frames paths with NUL so any name parses.
+        # Errors are discarded anyway, so rg need not format them.
         cmd = [
             "rg",
-            "--json",
-            "--line-number",
-            "--with-filename",
+            "--no-config",
+            "--no-messages",
+            "--no-heading",
+            "--null",
+            "--threads",
+            str(self.threads),
+            "--mmap",
+            *args,
             query,
             str(self.root),
         ]
@@ -146,24 +422,34 @@ class SearchEngine:
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.DEVNULL,
-                text=True,
+                bufsize=_PIPE_BUFFER,
+                # Byte-oriented locale; results do not depend on the user's
+                env={**os.environ, "LC_ALL": "C"},
             )
         except FileNotFoundError:
             raise RuntimeError(
                 "ripgrep (rg) not found. Please install it."
             )
 
-        for line in proc.stdout:
-            try:
-                event = json.loads(line)
-            except json.JSONDecodeError:
-                continue
+        try:
+            yield from proc.stdout
+        finally:
+            proc.stdout.close()
+            proc.wait()
+
+    def _grep(self, query: str):
 
-            if event.get("type") == "match":
-                yield {
-                    "file": event["data"]["path"]["text"],
-                    "line": event["data"]["line_number"],
-                    "text": event["data"]["lines"]["text"],
-                }
+        # Plain `path NUL lineno:text` framing; no JSON to parse.
+        for line in self._run_rg(["--line-number", "--with-filename"], query):
+            path, sep, rest = line.partition(b"\0")
+            lineno, sep2, text = rest.partition(b":")
+
+            # Skip anything that is not a match line (e.g. binary notices)
+            if not (sep and sep2 and lineno.isdigit()):
+                continue
 
-        proc.wait()
\ No newline at end of file
+            yield {
+                "file": os.fsdecode(path),
+                "line": int(lineno),
+                "text": text.decode("utf-8", errors="replace"),
+            }
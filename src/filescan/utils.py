@@ -1,23 +1,149 @@
+import logging
 import os
+import re
+from functools import lru_cache, wraps
 from pathlib import Path
+from typing import Iterable, Optional
 from pathspec import PathSpec
+from pathspec.util import normalize_file
+
+_log_debug = logging.getLogger(__name__).debug
 
 
 def makedir_exist_ok(path):
     Path(path).parent.mkdir(parents=True, exist_ok=True)
 
 
+# A bare file/directory name: no glob, escape, negation, comment or slash
+_PLAIN_NAME = re.compile(r"[^*?\[\]\\!#/\s]+")
+
+
+class IgnoreSpec:
+    """
+    gitwildmatch ignore rules with a set-lookup fast path.
+
+    Plain `name`, `name/`, `*suffix` and `*suffix/` patterns (the bulk of
+    typical ignore files) are answered by checking path components
+    against sets and suffix tuples. The remaining glob / anchored
+    patterns are compiled by pathspec and fused into one alternation
+    regex, so a path costs a single C-level match instead of one match
+    per pattern. Without negations, a path is ignored iff any pattern
+    matches, so splitting the patterns this way gives the same answers.
+    Files containing a `!` pattern use PathSpec for everything.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        patterns = list(patterns)
+
+        self.names = set()
+        self.dir_names = set()
+        suffixes = []
+        dir_suffixes = []
+        residue = []
+
+        negated = any(line.startswith("!") for line in patterns)
+
+        for line in patterns:
+            if not negated:
+                dir_only = line.endswith("/")
+                body = line[:-1] if dir_only else line
+
+                if _PLAIN_NAME.fullmatch(body) and body not in (".", ".."):
+                    (self.dir_names if dir_only else self.names).add(body)
+                    continue
+                if body.startswith("*") and _PLAIN_NAME.fullmatch(body[1:]):
+                    (dir_suffixes if dir_only else suffixes).append(body[1:])
+                    continue
+            residue.append(line)
+
+        self.suffixes = tuple(suffixes)
+        self.dir_suffixes = tuple(dir_suffixes)
+
+        self.spec: Optional[PathSpec] = (
+            PathSpec.from_lines("gitwildmatch", residue) if residue else None
+        )
+
+        # Last-match-wins only matters with negations; otherwise any hit
+        # ignores the path and the patterns can share one regex.
+        self._residue_match = None
+        if self.spec is not None:
+            if negated:
+                self._residue_match = self.spec.match_file
+            else:
+                regexes = [
+                    p.regex.pattern.replace("(?P<ps_d>", "(?:")
+                    for p in self.spec.patterns
+                    if p.include
+                ]
+                if regexes:
+                    fused = re.compile("|".join(f"(?:{r})" for r in regexes))
+                    self._residue_match = _fused_matcher(fused.match)
+
+    def match_file(self, path: str) -> bool:
+        """
+        Match a "/"-separated relative path; directories end with "/".
+        """
+        parts = path.split("/")
+
+        if parts[-1]:
+            dirs = parts[:-1]
+        else:
+            parts.pop()
+            dirs = parts
+
+        if not self.names.isdisjoint(parts):
+            return True
+        if not self.dir_names.isdisjoint(dirs):
+            return True
+
+        suffixes = self.suffixes
+        if suffixes and any(part.endswith(suffixes) for part in parts):
+            return True
+
+        dir_suffixes = self.dir_suffixes
+        if dir_suffixes and any(part.endswith(dir_suffixes) for part in dirs):
+            return True
+
+        residue_match = self._residue_match
+        return residue_match is not None and residue_match(path)
+
+
+def _fused_matcher(match):
+    def match_file(path: str) -> bool:
+        return match(normalize_file(path)) is not None
+
+    return match_file
+
+
 def load_ignore_spec(ignore_file: Path):
+    """
+    Load a compiled IgnoreSpec, shared across scanners.
+
+    Specs are cached on (path, mtime, size), so editing the file is
+    picked up while repeated scans reuse one compiled spec.
+    """
     if ignore_file is None:
         return None
-    patterns = ignore_file.read_text(encoding="utf-8").splitlines()
-    ignore_spec = PathSpec.from_lines("gitwildmatch", patterns)
-    return ignore_spec
+    # Key on the real path so every spelling of one file shares an entry
+    path = os.path.realpath(ignore_file)
+    stat = os.stat(path)
+    return _compile_ignore_spec(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=32)
+def _compile_ignore_spec(path: str, mtime_ns: int, size: int) -> IgnoreSpec:
+    with open(path, "rb") as f:
+        patterns = f.read().decode("utf-8").splitlines()
+    return IgnoreSpec(patterns)
 
 
 def simple_decorator(func):
+    """
+    Log each call to `func` at DEBUG level (a no-op when disabled).
+    """
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        print(f"Calling {func.__name__}")
+        _log_debug("Calling %s", func.__name__)
         return func(*args, **kwargs)
 
     return wrapper
@@ -163,3 +163,30 @@ def test_ast_line_numbers(tmp_path):
 
     assert lineno == 2
     assert end_lineno >= lineno
+
+
+# -------------------------------------------------
+# IGNORED DIRECTORIES
+# -------------------------------------------------
+
+def test_ast_skips_ignored_directories(tmp_path):
+    root = tmp_path / "proj"
+    (root / "build" / "deep").mkdir(parents=True)
+    (root / "pkg").mkdir()
+
+    (root / "pkg" / "keep.py").write_text("def keep():\n    pass\n")
+    (root / "build" / "deep" / "skip.py").write_text("def skip():\n    pass\n")
+    (root / "skip.log.py").write_text("def noise():\n    pass\n")
+
+    ignore = tmp_path / ".fscanignore"
+    ignore.write_text("build/\n*.log.py\n")
+
+    scanner = AstScanner(root, ignore_file=ignore)
+    graph = types.SimpleNamespace(nodes={}, edges=[], edge_ids=set())
+    scanner.scan_into(graph)
+
+    names = {node["name"] for node in graph.nodes.values()}
+
+    assert "keep" in names
+    assert "skip" not in names
+    assert "noise" not in names
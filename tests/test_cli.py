@@ -45,6 +45,12 @@ class DummySearchEngine:
         self.graph = graph
 
     def search(self, query):
+        return list(self.iter_search(query))
+
+    def search_topk(self, query, k):
+        return self.search(query)[:k]
+
+    def iter_search(self, query):
         return [
             {
                 "file": str(Path(self.root) / "a.py"),
@@ -110,6 +116,7 @@ def test_cmd_scan(monkeypatch, tmp_path):
         ast_only=False,
         output="graph",
         output_ast=None,
+        no_size=False,
     )
 
     dummy = DummyBuilder()
@@ -130,6 +137,7 @@ def test_cmd_scan_default_output_uses_root_name(monkeypatch, tmp_path):
         ast_only=False,
         output=None,
         output_ast=None,
+        no_size=False,
     )
 
     dummy = DummyBuilder()
@@ -156,6 +164,26 @@ def test_main_scan_defaults_root_to_current_dir(monkeypatch):
     assert called["root"] == "."
 
 
+def test_main_search_limit_must_be_positive(monkeypatch, capsys):
+    called = {}
+
+    def fake_cmd_search(args):
+        called["limit"] = args.limit
+
+    monkeypatch.setattr("filescan.commands.cli.cmd_search", fake_cmd_search)
+    argv = ["filescan", "search", ".", "foo", "--nodes", "n.csv", "--edges", "e.csv"]
+
+    monkeypatch.setattr("sys.argv", argv + ["--limit", "2"])
+    main()
+    assert called["limit"] == 2
+
+    for bad in ("0", "-1", "x"):
+        monkeypatch.setattr("sys.argv", argv + ["--limit", bad])
+        with pytest.raises(SystemExit):
+            main()
+        assert "--limit" in capsys.readouterr().err
+
+
 # =====================================================
 # WATCH COMMAND
 # =====================================================
@@ -193,6 +221,7 @@ def test_cmd_search(monkeypatch, tmp_path, capsys):
         query="foo",
         nodes=str(nodes),
         edges=str(edges),
+        limit=None,
     )
 
     monkeypatch.setattr("filescan.commands.cli.GraphBuilder", DummyBuilder)
@@ -0,0 +1,84 @@
+from watchfiles import Change
+
+from filescan.file_watcher import FileWatcher
+
+
+# =====================================================
+# Helpers
+# =====================================================
+
+def make_watcher(root, monkeypatch):
+    watcher = FileWatcher(root, output=root.parent / "out")
+    monkeypatch.setattr(watcher, "_export_all", lambda: None)
+
+    watcher.builder.build(
+        [watcher.root],
+        include_filesystem=True,
+        include_ast=True,
+    )
+    return watcher
+
+
+def fs_names(builder):
+    return sorted(node["name"] for node in builder.filesystem.nodes.values())
+
+
+# =====================================================
+# TEST: change batches
+# =====================================================
+
+def test_delete_and_recreate_in_one_batch_is_an_update(tmp_path, monkeypatch):
+    root = tmp_path / "proj"
+    root.mkdir()
+    a = root / "a.py"
+    a.write_text("def foo():\n    pass\n")
+
+    watcher = make_watcher(root, monkeypatch)
+
+    # Rename-on-save: the file is deleted and recreated within one batch
+    a.write_text("def foo():\n    pass\n\ndef bar():\n    pass\n")
+    changes = {(Change.deleted, str(a)), (Change.added, str(a))}
+
+    watcher._handle_changes(changes, *FileWatcher._classify(changes))
+
+    by_qname = watcher.builder.ast.by_qname
+    assert {"proj.a", "proj.a.foo", "proj.a.bar"} <= set(by_qname)
+    assert fs_names(watcher.builder) == ["a.py", "proj"]
+
+
+def test_deleting_one_init_keeps_other_packages(tmp_path, monkeypatch):
+    root = tmp_path / "proj"
+    for pkg in ("one", "two"):
+        (root / pkg).mkdir(parents=True)
+        (root / pkg / "__init__.py").write_text("def setup():\n    pass\n")
+
+    watcher = make_watcher(root, monkeypatch)
+
+    init = root / "one" / "__init__.py"
+    init.unlink()
+    changes = {(Change.deleted, str(init))}
+
+    watcher._handle_changes(changes, *FileWatcher._classify(changes))
+
+    by_qname = watcher.builder.ast.by_qname
+    assert "proj.one" not in by_qname
+    assert {"proj.two", "proj.two.setup"} <= set(by_qname)
+    assert "__init__.py" in fs_names(watcher.builder)
+
+
+def test_deleting_a_directory_removes_its_modules(tmp_path, monkeypatch):
+    root = tmp_path / "proj"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "mod.py").write_text("def f():\n    pass\n")
+    (root / "top.py").write_text("def g():\n    pass\n")
+
+    watcher = make_watcher(root, monkeypatch)
+
+    (root / "pkg" / "mod.py").unlink()
+    (root / "pkg").rmdir()
+    changes = {(Change.deleted, str(root / "pkg"))}
+
+    watcher._handle_changes(changes, *FileWatcher._classify(changes))
+
+    assert sorted(watcher.builder.ast.nodes_by_file) == ["top.py"]
+    assert fs_names(watcher.builder) == ["proj", "top.py"]
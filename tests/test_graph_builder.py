@@ -1,7 +1,11 @@
+import os
+import pickle
+import sys
 from pathlib import Path
 
+import pytest
+
 from filescan.graph_builder import GraphBuilder
-from filescan.search_engine import SearchEngine
 
 
 # =====================================================
@@ -70,6 +74,36 @@ def test_adjacency_consistency(tmp_path):
         assert edge in builder.ast.in_edges[edge["target"]]
 
 
+def test_relations_from_matches_out_edge_scan(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text(
+        "def foo():\n"
+        "    pass\n"
+        "\n"
+        "def bar():\n"
+        "    foo()\n"
+        "    return foo\n"
+    )
+
+    ast = GraphBuilder().build([root], include_ast=True).ast
+
+    for source, edges in list(ast.out_edges.items()):
+        relations = ast.relations_from(source)
+
+        for target, (pos, relation) in relations.items():
+            first = next(i for i, e in enumerate(edges) if e["target"] == target)
+            assert pos == first
+            assert relation == edges[first]["relation"]
+
+        assert set(relations) == {e["target"] for e in edges}
+
+    bar = ast.by_qname["proj.a.bar"]
+    foo = ast.by_qname["proj.a.foo"]
+    assert foo in ast.relations_from(bar)
+
+
 # =====================================================
 # FIND SYMBOL AT LINE
 # =====================================================
@@ -87,8 +121,8 @@ def test_symbol_index_supports_find_symbol_at(tmp_path):
     builder = GraphBuilder()
     builder.build([root], include_ast=True)
 
-    engine = SearchEngine(root, builder.ast)
-    node_id = engine._find_symbol_at("a.py", 2)
+    node_id = builder.ast.find_symbol_at("a.py", 2)
+    assert builder.ast.symbol_lookup("a.py")(2) == node_id
 
     assert node_id is not None
     node = builder.ast.nodes[node_id]
@@ -174,6 +208,23 @@ def test_graph_is_deterministic(tmp_path):
     assert b1.ast.edges == b2.ast.edges
 
 
+def test_threaded_index_build_matches_serial(tmp_path, monkeypatch):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("class A:\n    def run(self):\n        return foo()\n")
+    (root / "b.py").write_text("def foo():\n    pass\n")
+
+    serial = GraphBuilder().build([root], include_filesystem=True, include_ast=True)
+
+    monkeypatch.setattr("filescan.graph_builder._gil_disabled", lambda: True)
+    threaded = GraphBuilder().build([root], include_filesystem=True, include_ast=True)
+
+    for attr in ("by_qname", "by_name", "symbols_by_file", "out_edges", "in_edges"):
+        assert getattr(threaded.ast, attr) == getattr(serial.ast, attr)
+    assert threaded.filesystem.out_edges == serial.filesystem.out_edges
+
+
 def test_export_ast_mermaid_from_graph(tmp_path):
     root = tmp_path / "proj"
     root.mkdir()
@@ -205,3 +256,489 @@ def test_export_ast_mermaid_from_graph(tmp_path):
     assert "+run()" in content
     assert "_hidden" not in content
     assert "A --> B" in content
+
+
+# =====================================================
+# EXPORT + LOAD ROUND TRIP
+# =====================================================
+
+def test_export_and_load_csv_round_trip(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text(
+        "def foo():\n"
+        "    return 1\n"
+    )
+
+    builder = GraphBuilder().build([root], include_ast=True)
+    builder.export_ast(tmp_path / "out" / "proj_ast")
+
+    loaded = GraphBuilder().load(
+        tmp_path / "out" / "proj_ast_nodes.csv",
+        tmp_path / "out" / "proj_ast_edges.csv",
+        target="ast",
+    )
+
+    assert set(loaded.ast.nodes) == set(builder.ast.nodes)
+    assert len(loaded.ast.edges) == len(builder.ast.edges)
+
+    nid = loaded.ast.by_qname["proj.a.foo"]
+    assert loaded.ast.nodes[nid]["name"] == "foo"
+    assert loaded.ast.nodes[nid].get("missing") is None
+    assert loaded.ast.node_field(nid, "module_path") == "a.py"
+    assert loaded.ast.get_node(nid)["qualified_name"] == "proj.a.foo"
+
+    node = loaded.ast.nodes[nid]
+    assert "name" in node and "missing" not in node and "foo" not in node
+    assert node.as_dict() == loaded.ast.get_node(nid)
+    assert node.as_dict()["name"] == "foo"
+
+    # Records pickle on their own and show their field names
+    restored = pickle.loads(pickle.dumps(node))
+    assert restored == node and restored["name"] == "foo"
+    assert type(restored) is type(node)
+    assert "name='foo'" in repr(node)
+
+    ids = list(loaded.ast.nodes)
+    names, missing = loaded.ast.node_columns("name", "missing")
+    assert names[ids.index(nid)] == "foo"
+    assert set(missing) == {None}
+
+    # Schema descriptions survive the CSV round trip
+    assert loaded.ast.node_schema == builder.ast.node_schema
+    assert loaded.ast.find_symbol_at("a.py", 2) == nid
+
+    # Repeated string fields share one object across rows
+    module_paths = {id(node["module_path"]) for node in loaded.ast.nodes.values()}
+    assert len(module_paths) == 1
+
+    # Line numbers come back as ints, not CSV strings
+    assert loaded.ast.nodes[nid]["lineno"] == 1
+    assert loaded.ast.nodes[nid]["end_lineno"] == 2
+
+
+def test_export_and_load_json_round_trip(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+
+    builder = GraphBuilder().build([root], include_ast=True)
+    builder.export_ast(tmp_path / "out" / "proj_ast")
+
+    loaded = GraphBuilder().load(tmp_path / "out" / "proj_ast.json", target="ast")
+
+    assert set(loaded.ast.nodes) == set(builder.ast.nodes)
+    assert len(loaded.ast.edges) == len(builder.ast.edges)
+    assert "proj.a.foo" in loaded.ast.by_qname
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_streamed_json_export_matches_json_dump(tmp_path, monkeypatch, use_orjson):
+    import json
+
+    import filescan.graph_builder as graph_builder
+
+    if not use_orjson:
+        monkeypatch.setattr(graph_builder, "orjson", None)
+    # Force several batches per row list
+    monkeypatch.setattr(graph_builder, "_JSON_BATCH", 2)
+
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "a.py").write_text(
+        "class A:\n    def run(self):\n        return 'é'\n\ndef foo():\n    A().run()\n"
+    )
+
+    builder = GraphBuilder().build([root], include_ast=True)
+    builder.export_ast(tmp_path / "out" / "proj_ast")
+
+    graph = builder.ast
+    expected = json.dumps(
+        {
+            "node_schema": [{"name": n, "description": d} for n, d in graph.node_schema],
+            "edge_schema": [{"name": n, "description": d} for n, d in graph.edge_schema],
+            "nodes": list(graph.nodes.values()),
+            "edges": graph.edges,
+        },
+        indent=2,
+        ensure_ascii=False,
+    )
+
+    assert (tmp_path / "out" / "proj_ast.json").read_text(encoding="utf-8") == expected
+
+
+def test_load_cache_reuses_sidecar(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+
+    GraphBuilder().build([root], include_ast=True).export_ast(tmp_path / "out" / "proj_ast")
+    nodes = tmp_path / "out" / "proj_ast_nodes.csv"
+    edges = tmp_path / "out" / "proj_ast_edges.csv"
+
+    fresh = GraphBuilder().load(nodes, edges, target="ast", cache=True)
+    sidecars = list((tmp_path / "cache" / "filescan").iterdir())
+    assert len(sidecars) == 1
+
+    cached = GraphBuilder().load(nodes, edges, target="ast", cache=True)
+
+    assert cached.ast.nodes == fresh.ast.nodes
+    assert cached.ast.by_qname == fresh.ast.by_qname
+    assert cached.ast.out_edges == fresh.ast.out_edges
+    nid = cached.ast.by_qname["proj.a.foo"]
+    assert cached.ast.nodes[nid]["name"] == "foo"
+    assert cached.ast.find_symbol_at("a.py", 2) == nid
+
+    # Changed inputs get a new sidecar
+    nodes.write_text(nodes.read_text() + "\n")
+    GraphBuilder().load(nodes, edges, target="ast", cache=True)
+    assert len(list((tmp_path / "cache" / "filescan").iterdir())) == 2
+
+
+def test_load_cache_is_keyed_by_target(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+
+    GraphBuilder().build([root], include_ast=True).export_ast(tmp_path / "out" / "proj_ast")
+    nodes = tmp_path / "out" / "proj_ast_nodes.csv"
+    edges = tmp_path / "out" / "proj_ast_edges.csv"
+
+    # A filesystem load carries no semantic indexes; its sidecar must
+    # not be reused for an AST load of the same files
+    GraphBuilder().load(nodes, edges, target="filesystem", cache=True)
+    loaded = GraphBuilder().load(nodes, edges, target="ast", cache=True)
+
+    nid = loaded.ast.by_qname["proj.a.foo"]
+    assert loaded.ast.find_symbol_at("a.py", 2) == nid
+    assert len(list((tmp_path / "cache" / "filescan").iterdir())) == 2
+
+
+def test_export_and_load_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+
+    builder = GraphBuilder().build([root], include_ast=True)
+    builder.export_parquet(tmp_path / "out" / "proj_ast")
+
+    loaded = GraphBuilder().load(
+        tmp_path / "out" / "proj_ast_nodes.parquet",
+        tmp_path / "out" / "proj_ast_edges.parquet",
+        target="ast",
+    )
+
+    assert loaded.ast.nodes == builder.ast.nodes
+    assert loaded.ast.edges == builder.ast.edges
+    assert loaded.ast.node_schema == builder.ast.node_schema
+    assert loaded.ast.find_symbol_at("a.py", 2) == loaded.ast.by_qname["proj.a.foo"]
+
+
+def test_export_parquet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ImportError, match="pyarrow"):
+        GraphBuilder().export_parquet(tmp_path / "proj_ast")
+
+
+# =====================================================
+# INCREMENTAL REFRESH
+# =====================================================
+
+def _index_snapshot(graph):
+    return (
+        set(graph.nodes),
+        {e["id"] for e in graph.edges},
+        graph.edge_ids,
+        graph.by_qname,
+        {k: sorted(v) for k, v in graph.by_name.items()},
+        {k: sorted(v) for k, v in graph.nodes_by_file.items()},
+        dict(graph.symbols_by_file),
+        {k: sorted(e["id"] for e in v) for k, v in graph.out_edges.items() if v},
+        {k: sorted(e["id"] for e in v) for k, v in graph.in_edges.items() if v},
+    )
+
+
+def test_refresh_matches_full_build(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+    (root / "b.py").write_text(
+        "from proj.a import foo\n"
+        "\n"
+        "def run():\n"
+        "    return foo()\n"
+    )
+    (root / "c.py").write_text("def gone():\n    pass\n")
+
+    builder = GraphBuilder().build([root], include_ast=True)
+
+    (root / "a.py").write_text(
+        "def bar():\n"
+        "    return 2\n"
+        "\n"
+        "def foo():\n"
+        "    return bar()\n"
+    )
+    (root / "c.py").unlink()
+
+    builder.refresh([root / "a.py", root / "c.py", root / "notes.txt"])
+    expected = GraphBuilder().build([root], include_ast=True)
+
+    assert _index_snapshot(builder.ast) == _index_snapshot(expected.ast)
+    assert builder.ast.find_symbol_at("a.py", 5) == builder.ast.by_qname["proj.a.foo"]
+    assert builder.ast.find_symbol_at("c.py", 1) is None
+
+
+def test_refresh_rescans_modules_naming_new_symbols(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+    (root / "b.py").write_text(
+        "from proj.a import baz\n"
+        "\n"
+        "def run():\n"
+        "    return baz()\n"
+    )
+
+    builder = GraphBuilder().build([root], include_ast=True)
+
+    # b.py already names proj.a.baz; defining it must add b's edges
+    (root / "a.py").write_text(
+        "def foo():\n    return 1\n\ndef baz():\n    return 2\n"
+    )
+    builder.refresh([root / "a.py"])
+    expected = GraphBuilder().build([root], include_ast=True)
+
+    assert _index_snapshot(builder.ast) == _index_snapshot(expected.ast)
+
+    # Removing and re-adding the symbol round-trips the same way
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+    builder.refresh([root / "a.py"])
+    (root / "a.py").write_text(
+        "def foo():\n    return 1\n\ndef baz():\n    return 2\n"
+    )
+    builder.refresh([root / "a.py"])
+
+    assert _index_snapshot(builder.ast) == _index_snapshot(expected.ast)
+
+
+def _edge_snapshot(graph):
+    qname = {nid: node["qualified_name"] for nid, node in graph.nodes.items()}
+    return sorted(
+        (qname[e["source"]], e["relation"], qname[e["target"]], e["lineno"] or 0)
+        for e in graph.edges
+    )
+
+
+@pytest.mark.parametrize("delete_caller", [False, True])
+def test_refresh_of_several_modules_matches_full_build(tmp_path, delete_caller):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text("def foo():\n    return 1\n")
+    (root / "b.py").write_text(
+        "from proj.a import foo\n"
+        "\n"
+        "def run():\n"
+        "    return foo()\n"
+    )
+
+    builder = GraphBuilder().build([root], include_ast=True)
+
+    (root / "a.py").write_text("def foo():\n    return 2\n")
+    if delete_caller:
+        (root / "b.py").unlink()
+    else:
+        # The cross-module import and call go away
+        (root / "b.py").write_text("def run():\n    return 0\n")
+
+    builder.refresh([root / "a.py", root / "b.py"])
+    expected = GraphBuilder().build([root], include_ast=True)
+
+    assert _edge_snapshot(builder.ast) == _edge_snapshot(expected.ast)
+    assert _index_snapshot(builder.ast) == _index_snapshot(expected.ast)
+
+
+def test_update_filesystem_paths_on_fresh_builder(tmp_path):
+    root = tmp_path / "proj"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("a")
+    (root / "sub" / "b.txt").write_text("b")
+
+    builder = GraphBuilder()
+    builder.update_filesystem_paths([root])
+
+    names = sorted(node["name"] for node in builder.filesystem.nodes.values())
+    assert names == ["a.txt", "b.txt", "proj", "sub"]
+    assert len(builder.filesystem.edges) == 3
+
+
+def test_compact_refuses_rows_without_schema():
+    graph = GraphBuilder().filesystem
+    graph.nodes["n1"] = {"id": "n1", "name": "a"}
+
+    with pytest.raises(ValueError):
+        graph.compact()
+    assert graph.nodes["n1"] == {"id": "n1", "name": "a"}
+
+
+def test_refresh_requires_roots_for_loaded_graph():
+    with pytest.raises(ValueError):
+        GraphBuilder().refresh([Path("a.py")])
+
+
+# =====================================================
+# EXTRACT NODE SOURCE
+# =====================================================
+
+def test_extract_node_source(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text(
+        "x = 1\n"
+        "\n"
+        "def foo():\n"
+        "    return x\n"
+        "\n"
+        "def bar():\n"
+        "    return 2"
+    )
+
+    builder = GraphBuilder().build([root], include_ast=True)
+
+    foo = builder.extract_node_source(root, builder.ast.by_qname["proj.a.foo"])
+    assert foo == "def foo():\n    return x\n"
+
+    # Last line without a trailing newline
+    bar = builder.extract_node_source(root, builder.ast.by_qname["proj.a.bar"])
+    assert bar == "def bar():\n    return 2"
+
+    assert builder.extract_node_source(root, "missing") is None
+
+    # Rewrites that keep the mtime are still picked up via the size
+    stat = (root / "a.py").stat()
+    (root / "a.py").write_text("x = 10\n\ndef foo():\n    return x\n")
+    os.utime(root / "a.py", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    foo = builder.extract_node_source(root, builder.ast.by_qname["proj.a.foo"])
+    assert foo == "def foo():\n    return x\n"
+    assert builder.extract_node_source(root, builder.ast.by_qname["proj.a.bar"]) is None
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_extract_node_source_keeps_no_files_open(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    for i in range(20):
+        (root / f"m{i}.py").write_text(f"def f{i}():\n    return {i}\n")
+
+    builder = GraphBuilder().build([root], include_ast=True)
+    open_fds = len(os.listdir("/proc/self/fd"))
+
+    for i in range(20):
+        nid = builder.ast.by_qname[f"proj.m{i}.f{i}"]
+        assert builder.extract_node_source(root, nid) == f"def f{i}():\n    return {i}\n"
+
+    assert len(os.listdir("/proc/self/fd")) == open_fds
+
+
+# =====================================================
+# MERGED CONTEXT EXPORT
+# =====================================================
+
+def test_export_context_merged_strips_sections(tmp_path, monkeypatch):
+    nodes = tmp_path / "fs_nodes.csv"
+    edges = tmp_path / "fs_edges.csv"
+    nodes.write_text("\n# id: Unique node ID\nid,name\n1,a\n\n\n")
+    edges.write_text("id,source,target\n")
+
+    expected = (
+        "# " + "=" * 78 + "\n# FILESYSTEM NODES\n# " + "=" * 78 + "\n\n"
+        "# id: Unique node ID\nid,name\n1,a\n\n"
+        "# " + "=" * 78 + "\n# FILESYSTEM EDGES\n# " + "=" * 78 + "\n\n"
+        "id,source,target\n\n"
+    )
+
+    out = tmp_path / "ctx.txt"
+    GraphBuilder().export_context_merged(out, fs_nodes_path=nodes, fs_edges_path=edges)
+    assert out.read_text() == expected
+
+    # Portable fallback without os.sendfile
+    monkeypatch.delattr("os.sendfile", raising=False)
+    GraphBuilder().export_context_merged(out, fs_nodes_path=nodes, fs_edges_path=edges)
+    assert out.read_text() == expected
+
+
+def test_find_symbol_at_returns_innermost_symbol(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    (root / "a.py").write_text(
+        "class A:\n"
+        "    def run(self):\n"
+        "        return 1\n"
+        "\n"
+        "    x = 2\n"
+        "\n"
+        "def foo():\n"
+        "    pass\n"
+        "\n"
+        "y = 3\n"
+    )
+
+    ast = GraphBuilder().build([root], include_ast=True).ast
+
+    def name_at(line):
+        nid = ast.find_symbol_at("a.py", line)
+        return ast.nodes[nid]["name"] if nid else None
+
+    assert name_at(2) == "run"
+    assert name_at(3) == "run"
+    assert name_at(5) == "A"
+    assert name_at(8) == "foo"
+    assert name_at(10) is None
+    assert ast.find_symbol_at("missing.py", 1) is None
+
+
+def test_symbol_ranges_match_brute_force():
+    import random
+
+    from filescan.graph_builder import _SymbolRanges
+
+    rng = random.Random(0)
+
+    for _ in range(200):
+        ranges = []
+        for i in range(rng.randint(0, 20)):
+            start = rng.randint(1, 40)
+            ranges.append((start, start + rng.randint(0, 15), f"n{i}"))
+
+        index = _SymbolRanges(ranges)
+
+        for line in range(60):
+            containing = [r for r in ranges if r[0] <= line <= r[1]]
+            # Shortest wins; equal lengths go to the earliest start
+            expected = min(
+                containing, key=lambda r: (r[1] - r[0], r[0]), default=None
+            )
+            expected = expected[2] if expected else None
+
+            # Line table and the bisect walk agree with each other
+            assert index.innermost(line) == expected
+            assert index._walk(line) == expected
@@ -1,6 +1,12 @@
+import os
+import sys
 import types
 
+import pytest
+from pathspec import PathSpec
+
 from filescan.scanner import Scanner
+from filescan.utils import IgnoreSpec, load_ignore_spec
 
 
 def test_scanner_builds_basic_tree(tmp_path):
@@ -72,3 +78,136 @@ def test_scanner_respects_ignore_file(tmp_path):
 
     assert "keep.txt" in names
     assert "ignore.log" not in names
+
+
+def test_scanner_walk_does_not_recurse_per_directory(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    depth = 200
+    path = root
+    for _ in range(depth):
+        path = path / "d"
+        path.mkdir()
+    (path / "leaf.txt").write_text("x")
+
+    # Leave less headroom than one frame per directory would need
+    frame, used = sys._getframe(), 0
+    while frame is not None:
+        frame, used = frame.f_back, used + 1
+
+    scanner = Scanner(root)
+    graph = types.SimpleNamespace(nodes={}, edges=[], edge_ids=set())
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(used + depth // 2)
+    try:
+        scanner.scan_into(graph)
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert len(graph.nodes) == depth + 2
+    assert len(graph.edges) == depth + 1
+
+
+def test_scanner_prefetch_matches_serial_walk(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+
+    for i in range(8):
+        sub = root / f"pkg{i}"
+        sub.mkdir()
+        (sub / "mod.py").write_text("x" * i)
+        (sub / "nested").mkdir()
+        (sub / "nested" / "data.txt").write_text("y")
+    (root / "skip.log").write_text("no")
+
+    ignore_file = tmp_path / ".fscanignore"
+    ignore_file.write_text("*.log\npkg3/\n")
+
+    graphs = []
+    for workers in (1, 4):
+        scanner = Scanner(root, ignore_file=ignore_file, workers=workers)
+        graph = types.SimpleNamespace(nodes={}, edges=[], edge_ids=set())
+        scanner.scan_into(graph)
+        graphs.append(graph)
+
+    serial, threaded = graphs
+    assert list(threaded.nodes.items()) == list(serial.nodes.items())
+    assert threaded.edges == serial.edges
+    assert "skip.log" not in {n["name"] for n in serial.nodes.values()}
+    assert len(serial.nodes) == 1 + 7 * 4
+
+
+def test_ignore_spec_matches_pathspec():
+    paths = [
+        "build", "build/", "src/build/x.py", "a/b.pyc", "a.pyc/",
+        "pkg.egg-info/", "pkg.egg-info", "docs/a/b", "docs", "keep.log",
+        "src/main.py", "x/keep.log",
+    ]
+
+    for patterns in (
+        ["build/", "*.pyc", "*.egg-info/", "/docs/a", "*.log"],
+        ["build/", "*.log", "!keep.log"],
+    ):
+        reference = PathSpec.from_lines("gitwildmatch", patterns)
+        spec = IgnoreSpec(patterns)
+
+        for path in paths:
+            assert spec.match_file(path) == reference.match_file(path), path
+
+
+def test_scanner_symlink_outside_root(tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "data.txt").write_text("x")
+
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("a")
+
+    try:
+        (root / "link").symlink_to(outside, target_is_directory=True)
+    except OSError:
+        pytest.skip("symlinks not supported")
+
+    scanner = Scanner(root, workers=1)
+    graph = types.SimpleNamespace(nodes={}, edges=[], edge_ids=set())
+    scanner.scan_into(graph)
+
+    paths = {node["abs_path"] for node in graph.nodes.values()}
+
+    assert (root / "a.txt").as_posix() in paths
+    assert (outside / "data.txt").as_posix() in paths
+
+
+def test_load_ignore_spec_is_cached_until_file_changes(tmp_path):
+    ignore = tmp_path / ".fscanignore"
+    ignore.write_text("build/\n")
+
+    first = load_ignore_spec(ignore)
+    assert load_ignore_spec(ignore) is first
+
+    ignore.write_text("dist/\n")
+    stat = ignore.stat()
+    os.utime(ignore, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = load_ignore_spec(ignore)
+    assert second is not first
+    assert second.match_file("dist/")
+    assert not second.match_file("build/")
+
+
+def test_scanner_without_size_collection(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("hello")
+
+    scanner = Scanner(root, collect_size=False)
+    graph = types.SimpleNamespace(nodes={}, edges=[], edge_ids=set())
+    scanner.scan_into(graph)
+
+    files = [n for n in graph.nodes.values() if n["type"] == "f"]
+
+    assert [n["name"] for n in files] == ["a.txt"]
+    assert files[0]["size"] is None
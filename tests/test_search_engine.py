@@ -1,7 +1,17 @@
+import os
+import pickle
+import sys
 from pathlib import Path
 
+import pytest
+
 from filescan.graph_builder import GraphBuilder
-from filescan.search_engine import SearchEngine
+from filescan.search_engine import (
+    Match,
+    SearchEngine,
+    _first_hit_matcher,
+    group_by_symbol,
+)
 
 
 # =====================================================
@@ -52,6 +62,9 @@ def test_search_definition(tmp_path, monkeypatch):
     assert len(results) == 1
     assert results[0]["match_type"] == "definition"
 
+    # Results carry graph records and must still pickle
+    assert pickle.loads(pickle.dumps(results)) == results
+
 
 # =====================================================
 # TEST: semantic reference match
@@ -114,6 +127,28 @@ def test_search_unknown(tmp_path, monkeypatch):
     assert results[0]["match_type"] == "unknown"
 
 
+def test_search_without_symbols(tmp_path, monkeypatch):
+    engine = SearchEngine(tmp_path, GraphBuilder().ast)
+
+    monkeypatch.setattr(
+        engine,
+        "_grep",
+        lambda query: [{"file": "sub/../a.py", "line": 3, "text": " x\n"}],
+    )
+
+    (result,) = engine.search("x")
+
+    assert result == Match(
+        str(tmp_path.resolve() / "a.py"), 3, "x", None, None, "unknown"
+    )
+    assert result["line"] == result.line == 3
+    assert result.get("symbol") is None
+    assert result.get("missing", "d") == "d"
+    assert dict(result.items())["match_type"] == "unknown"
+    assert "symbol" in result and "missing" not in result and "x" not in result
+    assert result.as_dict()["file"] == result.file
+
+
 # =====================================================
 # TEST: result sorting priority
 # =====================================================
@@ -146,4 +181,158 @@ def test_search_priority_sorting(tmp_path, monkeypatch):
     results = engine.search("foo")
 
     # Definition should come before calls/references
-    assert results[0]["match_type"] == "definition"
\ No newline at end of file
+    assert results[0]["match_type"] == "definition"
+
+    top = engine.search_topk("foo", 1)
+    assert top == results[:1]
+
+
+def test_iter_search_streams_in_grep_order(tmp_path, monkeypatch):
+    root, engine = build_engine(
+        tmp_path,
+        {
+            "a.py": "def foo():\n    foo()\n"
+        },
+    )
+
+    consumed = []
+
+    def fake_grep(query):
+        for line, text in ((2, "    foo()\n"), (1, "def foo():\n")):
+            consumed.append(line)
+            yield {"file": str(root / "a.py"), "line": line, "text": text}
+
+    monkeypatch.setattr(engine, "_grep", fake_grep)
+
+    results = engine.iter_search("foo")
+
+    first = next(results)
+    assert first["line"] == 2
+    assert consumed == [2]
+
+    assert [r["line"] for r in results] == [1]
+
+
+def test_grep_cache_reuses_matches_until_invalidated(tmp_path, monkeypatch):
+    engine = SearchEngine(tmp_path, GraphBuilder().ast, cache_size=1)
+    calls = []
+
+    def fake_grep(query):
+        calls.append(query)
+        yield {"file": str(tmp_path / "a.py"), "line": 1, "text": query}
+
+    monkeypatch.setattr(engine, "_grep", fake_grep)
+
+    first = engine.search("foo")
+    assert engine.search("foo") == first
+    assert calls == ["foo"]
+
+    engine.search("bar")  # evicts "foo"
+    engine.search("foo")
+    assert calls == ["foo", "bar", "foo"]
+
+    engine.invalidate()
+    engine.search("foo")
+    assert calls == ["foo", "bar", "foo", "foo"]
+
+
+# =====================================================
+# TEST: ripgrep output parsing
+# =====================================================
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake rg is a shell script")
+def test_grep_parses_null_separated_matches(tmp_path, monkeypatch):
+    output = tmp_path / "rg.out"
+    output.write_bytes(
+        b"a.py\x001:def foo():\n"
+        b"dir/b.py\x0012:    x = {'k': 1}\r\n"
+        b"c.bin\x00binary file matches (found \"\\0\" byte around offset 3)\n"
+    )
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    rg = bin_dir / "rg"
+    args = tmp_path / "rg.args"
+    rg.write_text(
+        f"#!/bin/sh\necho \"$LC_ALL $@\" > '{args}'\ncat '{output}'\n"
+    )
+    rg.chmod(0o755)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    engine = SearchEngine(tmp_path, GraphBuilder().ast, threads=3)
+
+    assert list(engine._grep("foo")) == [
+        {"file": "a.py", "line": 1, "text": "def foo():\n"},
+        {"file": "dir/b.py", "line": 12, "text": "    x = {'k': 1}\r\n"},
+    ]
+
+    locale, *argv = args.read_text().split()
+    assert locale == "C"
+    assert "--no-config" in argv
+    assert argv[argv.index("--threads") + 1] == "3"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake rg is a shell script")
+def test_count_and_files_matching(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    rg = bin_dir / "rg"
+    rg.write_text(
+        "#!/bin/sh\n"
+        "case \"$*\" in\n"
+        "  *--count*) printf 'a.py\\0002\\ndir/b.py\\00011\\n' ;;\n"
+        "  *--files-with-matches*) printf 'a.py\\000dir/b.py\\000' ;;\n"
+        "esac\n"
+    )
+    rg.chmod(0o755)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    engine = SearchEngine(tmp_path, GraphBuilder().ast)
+
+    assert engine.count("foo") == {"a.py": 2, "dir/b.py": 11}
+    assert engine.files_matching("foo") == ["a.py", "dir/b.py"]
+
+
+# =====================================================
+# TEST: grouping by symbol
+# =====================================================
+
+def test_group_by_symbol_orders_files_symbols_and_lines():
+    def result(file, sid, line):
+        symbol = {"qualified_name": sid} if sid else None
+        return {"file": file, "symbol_id": sid, "symbol": symbol, "line": line}
+
+    results = [
+        result("b.py", "s2", 9),
+        result("a.py", "s1", 7),
+        result("a.py", None, 1),
+        result("a.py", "s1", 3),
+    ]
+
+    groups = group_by_symbol(results)
+
+    assert [(g["file"], g["symbol_id"]) for g in groups] == [
+        ("a.py", None),
+        ("a.py", "s1"),
+        ("b.py", "s2"),
+    ]
+    assert [r["line"] for r in groups[1]["matches"]] == [3, 7]
+    assert groups[1]["symbol"] == {"qualified_name": "s1"}
+
+
+# =====================================================
+# TEST: per-query relation matcher
+# =====================================================
+
+def test_first_hit_matcher_specializations():
+    relations = {"t1": (2, "calls"), "t2": (0, "inherits"), "t3": (5, "imports")}
+
+    assert _first_hit_matcher(frozenset()) is None
+    assert _first_hit_matcher(frozenset({"t1"}))(relations) == (2, "calls")
+    assert _first_hit_matcher(frozenset({"tx"}))(relations) is None
+
+    many = _first_hit_matcher(frozenset({"t1", "t3", "tx", "ty", "tz"}))
+    assert many(relations) == (2, "calls")
+    assert _first_hit_matcher(frozenset({"t1", "t2"}))(relations) == (0, "inherits")